@@ -104,6 +104,7 @@ def run_spider():
                 "format": "json",
                 "encoding": "utf8",
                 "indent": 2,
+                "overwrite": True,
             },
         },
         "FEED_EXPORT_ENCODING": "utf-8",
@@ -0,0 +1,155 @@
+"""
+Compare fp32 and dynamically int8-quantized CPU inference of a Qwen2.5 model.
+
+Prompts and reference answers come from a model output file in
+data/generated_output (produced by the fp32 model). Each variant runs in its
+own process so peak memory is measured independently, and the report shows
+load time, tokens/sec, peak RSS and answer quality (character-bigram F1
+against the stored fp32 answers) with the int8 - fp32 delta. The int8 cache
+is built in a separate process first, so the int8 figures are those of a
+normal cached load rather than the one-off fp32 load and quantization.
+
+Usage:
+    python compare_quantization.py --model path/to/Qwen2.5-0.5B \
+        --reference data/generated_output/Qwen25-05B_sample_output.jsonl --limit 10
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from metrics import char_ngram_f1
+
+ROOT = Path(__file__).resolve().parent
+
+
+def read_reference(path, limit=None):
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rows.append(json.loads(line))
+    return rows[:limit] if limit else rows
+
+
+def build_int8_cache(model_name):
+    """Quantize once so the int8 run loads from the cache; returns the load time"""
+    from finetuning import load_model
+
+    start = time.perf_counter()
+    load_model(model_name, quantize=True)
+    return time.perf_counter() - start
+
+
+def in_fresh_process(fn, *args):
+    # A fresh process per run keeps the peak RSS numbers separate
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def run_variant(model_name, quantize, prompts, max_new_tokens, repetition_penalty):
+    """Load one variant and generate an answer per prompt, in a fresh process"""
+    from finetuning import generate, load_model
+    from data_cleaning.instrumentation import peak_rss_mb
+
+    start = time.perf_counter()
+    model, tokenizer = load_model(model_name, quantize=quantize)
+    load_seconds = time.perf_counter() - start
+
+    predictions = []
+    new_tokens = 0
+    generate_seconds = 0.0
+    for prompt in prompts:
+        start = time.perf_counter()
+        output, prompt_length = generate(
+            prompt,
+            model,
+            tokenizer,
+            max_new_tokens=max_new_tokens,
+            repetition_penalty=repetition_penalty,
+            do_sample=False
+        )
+        generate_seconds += time.perf_counter() - start
+
+        generated = output[0, prompt_length:]
+        new_tokens += int((generated != tokenizer.pad_token_id).sum())
+        predictions.append(tokenizer.decode(generated, skip_special_tokens=True))
+
+    return {
+        "load_seconds": load_seconds,
+        "tokens_per_second": new_tokens / generate_seconds if generate_seconds else 0.0,
+        "new_tokens": new_tokens,
+        "peak_rss_mb": peak_rss_mb(),
+        "predictions": predictions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 CPU inference")
+    parser.add_argument("--model", required=True, help="Model id or local checkpoint")
+    parser.add_argument(
+        "--reference",
+        default=str(ROOT / "data" / "generated_output" / "Qwen25-05B_sample_output.jsonl"),
+        help="JSONL with 'prompt' and fp32 'prediction' fields"
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N prompts")
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    parser.add_argument("--repetition-penalty", type=float, default=1.5)
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    reference = read_reference(args.reference, args.limit)
+    prompts = [row["prompt"] for row in reference]
+    references = [row["prediction"] for row in reference]
+
+    # Without an existing cache this includes the fp32 load and the quantization
+    first_int8_load_seconds = in_fresh_process(build_int8_cache, args.model)
+
+    results = {}
+    for name, quantize in (("fp32", False), ("int8", True)):
+        result = in_fresh_process(
+            run_variant,
+            args.model,
+            quantize,
+            prompts,
+            args.max_new_tokens,
+            args.repetition_penalty
+        )
+        scores = [char_ngram_f1(p, r) for p, r in zip(result["predictions"], references)]
+        result["quality_f1"] = sum(scores) / len(scores) if scores else 0.0
+        results[name] = result
+
+    results["int8"]["first_load_seconds"] = first_int8_load_seconds
+
+    fp32, int8 = results["fp32"], results["int8"]
+    agreement = [char_ngram_f1(q, f) for q, f in zip(int8["predictions"], fp32["predictions"])]
+    summary = {
+        "model": args.model,
+        "prompts": len(prompts),
+        "variants": {
+            name: {k: v for k, v in result.items() if k != "predictions"}
+            for name, result in results.items()
+        },
+        "quality_delta": int8["quality_f1"] - fp32["quality_f1"],
+        "speedup": int8["tokens_per_second"] / fp32["tokens_per_second"] if fp32["tokens_per_second"] else None,
+        "int8_vs_fp32_f1": sum(agreement) / len(agreement) if agreement else 0.0,
+    }
+
+    print(f"{'variant':<8} {'load s':>8} {'tok/s':>8} {'peak MB':>9} {'F1 vs ref':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<8} {result['load_seconds']:>8.1f} {result['tokens_per_second']:>8.1f} "
+            f"{result['peak_rss_mb']:>9.0f} {result['quality_f1']:>10.3f}"
+        )
+    print(f"int8 first load (fp32 load + quantization + cache write): {int8['first_load_seconds']:.1f}s")
+    print(f"quality delta (int8 - fp32): {summary['quality_delta']:+.3f}")
+    print(f"int8 vs fp32 answer overlap (F1): {summary['int8_vs_fp32_f1']:.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 import json
+import argparse
+import sys
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / 'data_cleaning'))
+from instrumentation import stage, timed
+
+@timed()
 def read_jsonl(file_path: str) -> List[Dict]:
     """Read JSONL file and return list of dictionaries"""
     data = []
@@ -12,6 +18,7 @@ def read_jsonl(file_path: str) -> List[Dict]:
             data.append(json.loads(line))
     return data
 
+@timed()
 def transform_data(data: List[Dict]) -> pd.DataFrame:
     """Transform data to match target CSV format"""
     transformed = []
@@ -47,23 +54,47 @@ def extract_question(prompt: str) -> str:
     
     return base_prompt  # Fallback to returning the original prompt
 
+# Arena CSV in data/q_and_a written for each sample output
+ARENA_CSVS = {
+    "qwen25-3B-finetuned-sample-output.jsonl": "Qwen25-3B.csv",
+    "Qwen25-05B_sample_output.jsonl": "Qwen25-05B.csv",
+    "Qwen25-15B_sample_output.jsonl": "Qwen25-15B.csv",
+}
+
 def main():
+    parser = argparse.ArgumentParser(description="Convert model output JSONL files to arena CSVs")
+    parser.add_argument(
+        "input_files",
+        nargs="*",
+        help="JSONL files to convert (default: all sample outputs)"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Arena CSV to write; only with a single input file"
+    )
+    args = parser.parse_args()
+
     # Input and output paths
-    input_files = [
-        "qwen25-3B-finetuned-sample-output.jsonl",
-        "Qwen25-05B_sample_output.jsonl",
-        "Qwen25-15B_sample_output.jsonl"
-    ]
+    input_files = args.input_files or list(ARENA_CSVS)
+    if args.output and len(input_files) != 1:
+        parser.error("--output needs exactly one input file")
 
     for input_file in input_files:
-        output_file = Path(__file__).resolve().parent.parent / 'q_and_a' / f"{input_file.split('_')[0]}.csv"
+        if args.output:
+            output_file = Path(args.output)
+        else:
+            name = Path(input_file).name
+            arena_csv = ARENA_CSVS.get(name, f"{name.split('_')[0]}.csv")
+            output_file = Path(__file__).resolve().parent.parent / 'q_and_a' / arena_csv
         
         # Read and transform data
         data = read_jsonl(input_file)
         df = transform_data(data)
         
         # Save to CSV with UTF-8-SIG encoding to handle Chinese characters
-        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        with stage("write_csv", rows=len(df)):
+            df.to_csv(output_file, index=False, encoding='utf-8-sig')
         print(f"Successfully converted {len(df)} records to {output_file}")
 
 if __name__ == "__main__":
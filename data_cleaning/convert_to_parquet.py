@@ -0,0 +1,31 @@
+import argparse
+from pathlib import Path
+
+import file_source
+
+def default_inputs():
+    data_dir = Path(__file__).resolve().parent.parent / 'data'
+    return sorted(data_dir.rglob('*.json')) + sorted(data_dir.rglob('*.csv'))
+
+def convert(path: Path) -> Path:
+    """Convert one JSON/CSV dataset into a Parquet file next to it"""
+    path = Path(path)
+    df = file_source.read_source(path)
+    return file_source.write_parquet(df, path.with_suffix('.parquet'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert JSON/CSV datasets to Parquet")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help="Files to convert (default: every JSON/CSV file under data/)"
+    )
+    args = parser.parse_args()
+
+    for path in args.paths or default_inputs():
+        output = convert(path)
+        print(f"{path} -> {output} ({path.stat().st_size} -> {output.stat().st_size} bytes)")
+
+if __name__ == "__main__":
+    main()
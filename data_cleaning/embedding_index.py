@@ -0,0 +1,200 @@
+"""Local embedding index for semantic few-shot example retrieval"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def text_key(model_name: str, text: str) -> str:
+    """Stable cache key for one embedded text"""
+    return hashlib.sha1(f"{model_name}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingIndex:
+    """
+    Embeds descriptions with a small local model on CPU and persists the
+    vectors so regeneration only embeds rows whose text changed.
+
+    The cache directory holds `vectors.npy` (float32, L2-normalised, one row
+    per text) and `keys.json` (the content hash of each row). Vectors are
+    returned memory-mapped, so large corpora are not copied into RAM.
+
+    Args:
+        cache_dir (str | Path): Directory for the persisted index
+        model_name (str): Hugging Face model used for mean-pooled embeddings
+        batch_size (int): Number of texts embedded per forward pass
+    """
+
+    def __init__(self, cache_dir, model_name: str = DEFAULT_MODEL, batch_size: int = 32):
+        self.cache_dir = Path(cache_dir)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._tokenizer = None
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.cache_dir / "vectors.npy"
+
+    @property
+    def keys_path(self) -> Path:
+        return self.cache_dir / "keys.json"
+
+    def _load_model(self):
+        # Heavy dependencies are only needed when something must be embedded
+        from transformers import AutoModel, AutoTokenizer
+
+        if self._model is None:
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            self._model = AutoModel.from_pretrained(self.model_name)
+            self._model.eval()
+        return self._model, self._tokenizer
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts into L2-normalised float32 vectors"""
+        import torch
+
+        model, tokenizer = self._load_model()
+        batches = []
+        with torch.no_grad():
+            for start in range(0, len(texts), self.batch_size):
+                batch = list(texts[start:start + self.batch_size])
+                tokens = tokenizer(batch, padding=True, truncation=True, return_tensors="pt")
+                hidden = model(**tokens).last_hidden_state
+
+                # Mean pooling over non-padding tokens
+                mask = tokens["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                batches.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(batches).astype(np.float32)
+
+    def _load_cache(self):
+        if not (self.vectors_path.exists() and self.keys_path.exists()):
+            return {}, None
+        with open(self.keys_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model") != self.model_name:
+            return {}, None
+        vectors = np.load(self.vectors_path, mmap_mode="r")
+        return {key: row for row, key in enumerate(meta["keys"])}, vectors
+
+    def build(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Return one vector per text, embedding only texts missing from the cache.
+
+        Returns:
+            numpy.ndarray: Read-only memory-mapped matrix of shape (len(texts), dim)
+        """
+        texts = ["" if t is None else str(t) for t in texts]
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [text_key(self.model_name, t) for t in texts]
+        cached_rows, cached = self._load_cache()
+
+        if cached is not None and keys == list(cached_rows):
+            return cached
+
+        missing = [i for i, key in enumerate(keys) if key not in cached_rows]
+        fresh = self.embed([texts[i] for i in missing]) if missing else None
+
+        dim = fresh.shape[1] if fresh is not None else cached.shape[1]
+        vectors = np.empty((len(texts), dim), dtype=np.float32)
+        if fresh is not None:
+            vectors[missing] = fresh
+        hits = [i for i, key in enumerate(keys) if key in cached_rows]
+        if hits:
+            vectors[hits] = cached[[cached_rows[keys[i]] for i in hits]]
+        del cached
+
+        # Write to temporary files first so an interrupted run keeps the old index
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_vectors = self.vectors_path.with_suffix(".tmp.npy")
+        tmp_keys = self.keys_path.with_suffix(".tmp.json")
+        np.save(tmp_vectors, vectors)
+        with open(tmp_keys, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "keys": keys}, f)
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_keys, self.keys_path)
+
+        return np.load(self.vectors_path, mmap_mode="r")
+
+
+def top_k_neighbors(
+    query_vectors: np.ndarray,
+    index_vectors: np.ndarray,
+    query_cuisines: Sequence[str],
+    index_cuisines: Sequence[str],
+    k: int = 2,
+    exclude: List[set] = None,
+    block_size: int = 256
+) -> List[List[int]]:
+    """
+    Find the k most similar index rows for every query, one matrix multiply
+    per block of block_size queries.
+
+    Neighbours with the same cuisine are ranked first; when a cuisine has fewer
+    than k candidates the remaining slots fall back to the most similar rows
+    of any cuisine. Scores stay float32 and only one (block_size, n) block is
+    held at a time, so memory grows linearly with the index size.
+
+    Args:
+        query_vectors (numpy.ndarray): Normalised query vectors, shape (q, dim)
+        index_vectors (numpy.ndarray): Normalised index vectors, shape (n, dim)
+        query_cuisines (Sequence[str]): Cuisine of each query
+        index_cuisines (Sequence[str]): Cuisine of each index row
+        k (int): Number of neighbours to return per query
+        exclude (List[set]): Index positions to skip, one set per query
+        block_size (int): Number of queries scored per matrix multiply
+
+    Returns:
+        list: k index positions per query, most similar first
+    """
+    import pandas as pd
+
+    query_vectors = np.asarray(query_vectors, dtype=np.float32)
+    index_vectors = np.asarray(index_vectors, dtype=np.float32)
+    num_queries = len(query_vectors)
+
+    # Integer codes make the cuisine match a cheap vectorised comparison
+    codes, _ = pd.factorize(np.concatenate([
+        np.asarray(query_cuisines, dtype=object),
+        np.asarray(index_cuisines, dtype=object)
+    ]))
+    query_codes, index_codes = codes[:num_queries], codes[num_queries:]
+
+    k = min(k, len(index_vectors))
+    if k == 0:
+        return [[] for _ in range(num_queries)]
+
+    neighbors = []
+    for start in range(0, num_queries, block_size):
+        stop = min(start + block_size, num_queries)
+        scores = query_vectors[start:stop] @ index_vectors.T
+
+        if exclude is not None:
+            for row, positions in enumerate(exclude[start:stop]):
+                if positions:
+                    scores[row, list(positions)] = -np.inf
+
+        # Same-cuisine rows get a bonus larger than any cosine similarity gap
+        same_cuisine = query_codes[start:stop, None] == index_codes[None, :]
+        np.add(scores, np.float32(4.0), out=scores, where=same_cuisine)
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+
+        neighbors.extend(
+            [int(i) for i, score in zip(row, row_scores) if np.isfinite(score)]
+            for row, row_scores in zip(top, top_scores)
+        )
+    return neighbors
@@ -0,0 +1,29 @@
+"""Write the test-set questions answered by gpt_prompt.py"""
+import argparse
+from pathlib import Path
+
+import file_source
+from instrumentation import stage
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the questions of the QA test set")
+    parser.add_argument("--test", default=str(ROOT / "resto_new_test.csv"), help="QA test set")
+    parser.add_argument(
+        "--output",
+        default=str(ROOT / "data" / "q_and_a" / "testset_questions_only.csv"),
+        help="CSV with a 'question' column"
+    )
+    args = parser.parse_args()
+
+    with stage("export_questions") as stats:
+        questions = file_source.read_table(args.test, columns=["question"])
+        questions.to_csv(args.output, index=True, encoding="utf-8")
+        stats.rows = len(questions)
+    print(f"Wrote {len(questions)} questions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
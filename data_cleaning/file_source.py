@@ -1,4 +1,13 @@
+from __future__ import annotations
+
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Low-cardinality columns stored dictionary-encoded in Parquet
+CATEGORY_COLUMNS = ['菜式', '地區', '推介', '價錢']
 
 def restaurants():
     current_dir = Path(__file__).resolve().parent
@@ -10,7 +19,171 @@ def restaurants_d_js():
     json_path = current_dir.parent / 'data' / 'restaurants_d.json'
     return json_path
 
+def restaurants_d_parquet():
+    current_dir = Path(__file__).resolve().parent
+    parquet_path = current_dir.parent / 'data' / 'restaurants_d.parquet'
+    return parquet_path
+
 def qa_csv():
     current_dir = Path(__file__).resolve().parent
     csv_path = current_dir.parent / 'data' / 'restaurants_qa.csv'
-    return csv_path
\ No newline at end of file
+    return csv_path
+
+def write_parquet(df: pd.DataFrame, path) -> Path:
+    """
+    Write a DataFrame as Parquet with typed, dictionary-encoded columns.
+
+    Columns in CATEGORY_COLUMNS become categoricals, and mixed-type object
+    columns (e.g. 米芝蓮星星 holding both ints and "No Award") become strings.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype('category')
+        elif df[column].dtype == object:
+            types = {type(v) for v in df[column].dropna()}
+            if len(types) > 1:
+                df[column] = df[column].astype('string')
+
+    path = Path(path)
+    df.to_parquet(path, engine='pyarrow', compression='zstd')
+    return path
+
+def read_parquet(path, columns=None) -> pd.DataFrame:
+    """Read a Parquet file, loading only the requested columns"""
+    import pandas as pd
+
+    return pd.read_parquet(path, engine='pyarrow', columns=columns)
+
+def read_source(path, columns=None) -> pd.DataFrame:
+    """Read a legacy JSON or CSV dataset, restoring an unnamed index column"""
+    import pandas as pd
+
+    path = Path(path)
+    if path.suffix == '.json':
+        df = pd.read_json(path)
+        return df[columns] if columns else df
+
+    header = pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns
+    index_col = 0 if header[0] == '' or header[0].startswith('Unnamed') else None
+    usecols = None
+    if columns:
+        usecols = ([header[0]] if index_col is not None else []) + list(columns)
+    df = pd.read_csv(path, index_col=index_col, usecols=usecols, encoding='utf-8-sig')
+    if index_col is not None:
+        df.index.name = None
+    return df[columns] if columns else df
+
+def _fresh_parquet(path: Path):
+    """The Parquet sibling of path if it exists and is not older than path"""
+    parquet_path = path.with_suffix('.parquet')
+    if parquet_path.exists() and (
+        not path.exists() or parquet_path.stat().st_mtime >= path.stat().st_mtime
+    ):
+        return parquet_path
+    return None
+
+def read_table(path, columns=None) -> pd.DataFrame:
+    """
+    Read a dataset, preferring an up-to-date Parquet file next to the given
+    JSON/CSV path. The legacy formats are still accepted so stages keep
+    working before convert_to_parquet.py has been run.
+    """
+    path = Path(path)
+    parquet_path = _fresh_parquet(path)
+    if parquet_path is not None:
+        return read_parquet(parquet_path, columns=columns)
+    return read_source(path, columns=columns)
+
+def iter_table(path, columns=None, chunksize=10000) -> Iterator[pd.DataFrame]:
+    """
+    Yield a dataset as DataFrames of at most chunksize rows, preferring an
+    up-to-date Parquet sibling like read_table.
+
+    Parquet is read one record batch at a time and CSV/JSON Lines with the
+    pandas chunked readers. A JSON array cannot be parsed incrementally, so it
+    has to be converted with convert_to_parquet.py first.
+    """
+    import pandas as pd
+
+    path = Path(path)
+    parquet_path = _fresh_parquet(path)
+    if parquet_path is not None:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(parquet_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    if path.suffix == '.jsonl':
+        with pd.read_json(path, lines=True, chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield chunk[columns] if columns else chunk
+        return
+
+    if path.suffix != '.csv':
+        raise ValueError(
+            f"{path} cannot be read in chunks; run data_cleaning/convert_to_parquet.py first"
+        )
+
+    header = pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns
+    index_col = 0 if header[0] == '' or header[0].startswith('Unnamed') else None
+    with pd.read_csv(path, index_col=index_col, encoding='utf-8-sig', chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk[columns] if columns else chunk
+
+def read_restaurants(columns=None) -> pd.DataFrame:
+    """Load the restaurant corpus with districts, reading only the given columns"""
+    return read_table(restaurants_d_js(), columns=columns)
+
+class ChunkWriter:
+    """
+    Append DataFrame chunks to a CSV file, and optionally a Parquet file,
+    without holding the whole table in memory.
+
+    The CSV matches a single `to_csv(index=True, encoding='utf-8-sig')` call:
+    one header, then rows numbered continuously across chunks.
+    """
+
+    def __init__(self, csv_path, columns: list, parquet_path=None):
+        self.csv_path = Path(csv_path)
+        self.parquet_path = Path(parquet_path) if parquet_path else None
+        self.columns = list(columns)
+        self.rows = 0
+        self._csv = None
+        self._parquet = None
+
+    def __enter__(self):
+        import pandas as pd
+
+        self._csv = open(self.csv_path, 'w', encoding='utf-8-sig', newline='')
+        pd.DataFrame(columns=self.columns).to_csv(self._csv, index=True)
+        if self.parquet_path is not None:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = pa.schema([(column, pa.string()) for column in self.columns])
+            self._parquet = pq.ParquetWriter(self.parquet_path, schema, compression='zstd')
+        return self
+
+    def write(self, records: list):
+        """Append a list of row dicts"""
+        if not records:
+            return
+        import pandas as pd
+
+        df = pd.DataFrame(records, columns=self.columns, index=range(self.rows, self.rows + len(records)))
+        df.to_csv(self._csv, header=False, index=True)
+        if self._parquet is not None:
+            import pyarrow as pa
+
+            self._parquet.write_table(
+                pa.Table.from_pandas(df, schema=self._parquet.schema, preserve_index=False)
+            )
+        self.rows += len(records)
+
+    def __exit__(self, *exc):
+        self._csv.close()
+        if self._parquet is not None:
+            self._parquet.close()
@@ -0,0 +1,239 @@
+"""
+Lightweight timing and memory instrumentation for the pipeline scripts.
+
+Wrap hot code in `stage("name")` or decorate functions with `@timed()`.
+Durations and row counts are always collected (a perf_counter call per
+entry/exit). Setting the PIPELINE_PROFILE environment variable to a
+directory additionally:
+
+- samples the process RSS in a background thread to get a peak per stage,
+- dumps a cProfile file per outermost stage call
+  (`<dir>/<script>.<stage>.<call>.prof`, readable with pstats/snakeviz),
+- writes a JSON report of every stage to `<dir>/<script>.json` at exit.
+
+Process pool workers do not run atexit hooks, so a worker returns
+`take_records()` with its results and the parent folds them in with
+`merge_records()`.
+
+py-spy needs no hooks; run `py-spy record -o profile.svg -- python <script>`.
+"""
+import atexit
+import cProfile
+import functools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_DIR = os.environ.get("PIPELINE_PROFILE")
+if PROFILE_DIR:
+    PROFILE_DIR = str(Path(PROFILE_DIR).resolve())
+
+_records = {}
+_profile_calls = {}
+_depth = 0
+_lock = threading.Lock()
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+class _RssSampler(threading.Thread):
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, current_rss_mb())
+
+
+class StageStats:
+    """Counters for one invocation of a stage; set `rows` inside the block"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = None
+        self.seconds = 0.0
+        self.peak_rss_mb = None
+
+
+def _record(stats: StageStats):
+    with _lock:
+        record = _records.setdefault(stats.name, {
+            "calls": 0,
+            "seconds": 0.0,
+            "rows": 0,
+            "peak_rss_mb": None,
+        })
+        record["calls"] += 1
+        record["seconds"] += stats.seconds
+        if stats.rows is not None:
+            record["rows"] += stats.rows
+        if stats.peak_rss_mb is not None:
+            record["peak_rss_mb"] = max(record["peak_rss_mb"] or 0.0, stats.peak_rss_mb)
+
+
+@contextmanager
+def stage(name: str, rows: int = None):
+    """Time a block of code; profiled and memory-sampled when PIPELINE_PROFILE is set"""
+    global _depth
+    stats = StageStats(name)
+    stats.rows = rows
+
+    sampler = profiler = None
+    if PROFILE_DIR:
+        sampler = _RssSampler()
+        sampler.start()
+        # cProfile cannot nest, so only the outermost stage is profiled
+        if _depth == 0:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+    _depth += 1
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.seconds = time.perf_counter() - start
+        _depth -= 1
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(str(_profile_path(name)))
+        if sampler is not None:
+            stats.peak_rss_mb = sampler.stop()
+        _record(stats)
+
+
+def timed(name: str = None):
+    """
+    Decorator form of `stage`. Rows are taken from len() of the return value,
+    unless it is a tuple of several results.
+    """
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name) as stats:
+                result = func(*args, **kwargs)
+                if hasattr(result, "__len__") and not isinstance(result, tuple):
+                    stats.rows = len(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def take_records() -> dict:
+    """Return and clear the stages recorded in this process, e.g. in a pool worker"""
+    with _lock:
+        records = {name: dict(record) for name, record in _records.items()}
+        _records.clear()
+    return records
+
+
+def merge_records(records: dict):
+    """Fold stages recorded in another process into this process's report"""
+    with _lock:
+        for name, other in records.items():
+            record = _records.setdefault(name, {
+                "calls": 0,
+                "seconds": 0.0,
+                "rows": 0,
+                "peak_rss_mb": None,
+            })
+            record["calls"] += other["calls"]
+            record["seconds"] += other["seconds"]
+            record["rows"] += other["rows"]
+            if other["peak_rss_mb"] is not None:
+                record["peak_rss_mb"] = max(record["peak_rss_mb"] or 0.0, other["peak_rss_mb"])
+
+
+def report() -> dict:
+    """Structured summary of every stage recorded in this process"""
+    with _lock:
+        stages = {}
+        for name, record in _records.items():
+            seconds = record["seconds"]
+            stages[name] = dict(
+                record,
+                seconds=round(seconds, 6),
+                rows_per_sec=round(record["rows"] / seconds, 2) if seconds > 0 and record["rows"] else None,
+            )
+    return {
+        "script": _script_name(),
+        "peak_rss_mb": round(peak_rss_mb(), 2),
+        "stages": stages,
+    }
+
+
+def write_report(path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def _script_name() -> str:
+    return Path(sys.argv[0]).stem or "interactive"
+
+
+def _profile_path(stage_name: str) -> Path:
+    """Numbered per call, so a stage that runs several times keeps every dump"""
+    with _lock:
+        call = _profile_calls[stage_name] = _profile_calls.get(stage_name, 0) + 1
+    name = _script_name()
+    # Pool workers share argv with the parent, keep their dumps apart
+    if multiprocessing.parent_process() is not None:
+        name = f"{name}.{os.getpid()}"
+    return Path(PROFILE_DIR) / f"{name}.{stage_name}.{call}.prof"
+
+
+def _write_report_at_exit():
+    if _records:
+        path = write_report(Path(PROFILE_DIR) / f"{_script_name()}.json")
+        print(f"Profiling report written to {path}")
+
+
+def _reset_in_child():
+    # A forked worker starts with a copy of the parent's state; it should
+    # only report its own stages, and profile them as outermost
+    global _depth
+    _records.clear()
+    _profile_calls.clear()
+    _depth = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_in_child)
+
+if PROFILE_DIR:
+    Path(PROFILE_DIR).mkdir(parents=True, exist_ok=True)
+    atexit.register(_write_report_at_exit)
@@ -1,6 +1,9 @@
 import json
+import pandas as pd
 import file_source
+from instrumentation import stage, timed
 
+@timed()
 def add_districts(data):
     # Known districts in Hong Kong
     known_districts = [
@@ -25,15 +28,19 @@ def add_districts(data):
 
 def main():
     # Read the original JSON file
-    with open(file_source.restaurants(), 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with stage("load_restaurants") as stats:
+        with open(file_source.restaurants(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        stats.rows = len(data)
     
     # Add districts
     updated_data = add_districts(data)
     
     # Save to new file
-    with open(file_source.restaurants_d_js(), 'w', encoding='utf-8') as f:
-        json.dump(updated_data, f, ensure_ascii=False, indent=2)
+    with stage("write_restaurants", rows=len(updated_data)):
+        with open(file_source.restaurants_d_js(), 'w', encoding='utf-8') as f:
+            json.dump(updated_data, f, ensure_ascii=False, indent=2)
+        file_source.write_parquet(pd.DataFrame(updated_data), file_source.restaurants_d_parquet())
     
     # Print some statistics
     districts = {}
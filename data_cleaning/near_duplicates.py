@@ -0,0 +1,177 @@
+"""MinHash/LSH index for finding near-duplicate restaurant descriptions"""
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+# Shingle hashes are reduced to 31 bits so that a * x + b fits in uint64
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+MAX_HASH = np.uint32((1 << 31) - 1)
+
+
+def shingles(text: str, ngram: int = 3) -> set:
+    """Return the set of character n-grams of a description"""
+    text = "".join(text.split())
+    if len(text) <= ngram:
+        return {text} if text else set()
+    return {text[i:i + ngram] for i in range(len(text) - ngram + 1)}
+
+
+class MinHashLSH:
+    """
+    Near-duplicate index over character n-grams of short texts.
+
+    Each text is reduced to a MinHash signature of `num_perm` uint32 values.
+    Signatures are split into `bands` bands; every band is hashed to a single
+    uint64 key and the keys are kept as sorted arrays, so a lookup is a binary
+    search per band instead of a scan over every stored description.
+
+    Args:
+        num_perm (int): Number of hash permutations in each signature
+        bands (int): Number of LSH bands, must divide num_perm
+        ngram (int): Character n-gram size used for shingling
+        threshold (float): Minimum estimated Jaccard similarity for a match
+        seed (int): Seed for the permutation and band-hash coefficients
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 32,
+        ngram: int = 3,
+        threshold: float = 0.5,
+        seed: int = 1
+    ):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.threshold = threshold
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        # Odd multipliers used to fold the rows of a band into one key
+        self._band_mult = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._band_keys = None
+        self._band_ids = None
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a single text"""
+        grams = shingles(text or "", self.ngram)
+        if not grams:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+
+        hashes = np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) & 0x7FFFFFFF for g in grams),
+            dtype=np.uint64,
+            count=len(grams)
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """Fold signatures of shape (n, num_perm) into band keys of shape (n, bands)"""
+        rows = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (rows * self._band_mult).sum(axis=2)
+
+    def add_many(self, texts: Iterable[str]) -> None:
+        """
+        Add texts to the index in bulk and rebuild the band lookup tables.
+
+        Ids are assigned in insertion order, starting after any texts already
+        in the index, so they line up with a reset DataFrame index.
+        """
+        new = [self.signature(t) for t in texts]
+        if new:
+            self.signatures = np.vstack([self.signatures, np.stack(new)])
+
+        # Empty descriptions would all collide, so they never enter a bucket
+        valid = np.flatnonzero((self.signatures != MAX_HASH).any(axis=1))
+        keys = self._band_hashes(self.signatures[valid])
+
+        order = np.argsort(keys, axis=0, kind="stable")
+        self._band_keys = np.take_along_axis(keys, order, axis=0).T.copy()
+        self._band_ids = valid[order].T.astype(np.int64)
+
+    def candidates(self, signature: np.ndarray) -> np.ndarray:
+        """Return ids sharing at least one band with the given signature"""
+        if self._band_keys is None or (signature == MAX_HASH).all():
+            return np.empty(0, dtype=np.int64)
+
+        query_keys = self._band_hashes(signature[None, :])[0]
+        found = []
+        for band, key in enumerate(query_keys):
+            keys = self._band_keys[band]
+            lo = np.searchsorted(keys, key, side="left")
+            hi = np.searchsorted(keys, key, side="right")
+            if hi > lo:
+                found.append(self._band_ids[band, lo:hi])
+
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, text: str, threshold: float = None) -> List[int]:
+        """
+        Find stored texts that are near-duplicates of `text`.
+
+        Returns:
+            list: Ids whose estimated Jaccard similarity is at least threshold
+        """
+        threshold = self.threshold if threshold is None else threshold
+        signature = self.signature(text)
+        ids = self.candidates(signature)
+        if len(ids) == 0:
+            return []
+
+        similarity = (self.signatures[ids] == signature).mean(axis=1)
+        return ids[similarity >= threshold].tolist()
+
+    def duplicate_groups(self, threshold: float = None) -> np.ndarray:
+        """
+        Cluster every stored text with its near-duplicates.
+
+        Returns:
+            numpy.ndarray: Group label per id; near-duplicates share a label
+        """
+        threshold = self.threshold if threshold is None else threshold
+        parent = np.arange(len(self))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        if self._band_keys is None:
+            return parent
+
+        for keys, ids in zip(self._band_keys, self._band_ids):
+            # Equal keys are adjacent in the sorted band, compare each run to its head
+            run_starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            run_ends = np.r_[run_starts[1:], len(keys)]
+            for start, end in zip(run_starts, run_ends):
+                if end - start < 2:
+                    continue
+                head, members = ids[start], ids[start + 1:end]
+                similarity = (self.signatures[members] == self.signatures[head]).mean(axis=1)
+                for member in members[similarity >= threshold]:
+                    parent[find(member)] = find(head)
+
+        return np.array([find(i) for i in range(len(self))])
+
+
+def build_index(texts: Iterable[str], **kwargs) -> MinHashLSH:
+    """Build a MinHashLSH index over the given descriptions in one pass"""
+    index = MinHashLSH(**kwargs)
+    index.add_many(texts)
+    return index
@@ -1,6 +1,4 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
 from pathlib import Path
 
 # Set random seed for reproducibility
@@ -8,6 +6,9 @@ RANDOM_SEED = 42
 np.random.seed(RANDOM_SEED)
 
 def process_data():
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
     # Read the original CSV
     current_dir = Path(__file__).resolve().parent
     parent_dir = current_dir.parent 
@@ -47,7 +48,7 @@ def process_data():
     print(f"Testing records: {len(test_df)}")
 
 # Method 1: Using scikit-learn (Recommended)
-def split_data_sklearn(df, test_size=0.2, random_state=42):
+def split_data_sklearn(df, test_size=0.2, random_state=42, group_near_duplicates=False):
     """
     Split a DataFrame into train and test sets using scikit-learn.
     
@@ -59,6 +60,9 @@ def split_data_sklearn(df, test_size=0.2, random_state=42):
         Proportion of the dataset to include in the test split
     random_state : int, default=42
         Random seed for reproducibility
+    group_near_duplicates : bool, default=False
+        Keep near-duplicate descriptions (e.g. branches of the same chain)
+        on the same side of the split so they cannot leak into the test set
         
     Returns:
     --------
@@ -67,11 +71,27 @@ def split_data_sklearn(df, test_size=0.2, random_state=42):
     test_df : pandas.DataFrame
         Test dataset
     """
-    train_df, test_df = train_test_split(
-        df,
-        test_size=test_size,
-        random_state=random_state
-    )
+    # sklearn is slow to import, load it only when a split is requested
+    from sklearn.model_selection import train_test_split, GroupShuffleSplit
+
+    if group_near_duplicates:
+        from data_cleaning.near_duplicates import build_index
+
+        index = build_index(df['描述'].fillna('').tolist())
+        groups = index.duplicate_groups()
+        splitter = GroupShuffleSplit(
+            n_splits=1,
+            test_size=test_size,
+            random_state=random_state
+        )
+        train_idx, test_idx = next(splitter.split(df, groups=groups))
+        train_df, test_df = df.iloc[train_idx], df.iloc[test_idx]
+    else:
+        train_df, test_df = train_test_split(
+            df,
+            test_size=test_size,
+            random_state=random_state
+        )
     
     # Reset indices for both datasets
     train_df = train_df.reset_index(drop=True)
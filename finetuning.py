@@ -1,24 +1,54 @@
+import hashlib
+import inspect
+import os
+from pathlib import Path
 from typing import Dict
+import torch
+import transformers
 from datasets import Dataset, DatasetDict, load_dataset
-from transformers import AutoTokenizer, AutoModelForCausalLM, Trainer
+from transformers import (
+    AutoConfig,
+    AutoTokenizer,
+    AutoModelForCausalLM,
+    Trainer,
+    TrainingArguments,
+)
 from transformers.integrations import WandbCallback
 
-data_path = "data"
+try:
+    from transformers.initialization import no_init_weights
+except ImportError:  # transformers < 5
+    from transformers.modeling_utils import no_init_weights
+
+data_path = {
+    "train": "data/training/restaurants_qa_training.csv",
+    "val": "data/training/restaurants_qa_test.csv",
+}
 model_id  = "Qwen2.5-0.5b"
+quantized_cache_dir = Path(__file__).resolve().parent / "quantized_models"
+
 
+def build_prompt(x) -> str:
+    # Few-shot examples are only present in the training file and may be empty
+    parts = [x["question"], x.get("example_1"), x.get("example_2")]
+    return " ".join(p for p in parts if p)
 
 def preprocess_dataset(
     dataset: Dataset
 ):
-    dataset.select_columns(["input", "output", "id"])
-    dataset = dataset.map(
-        lambda x: {"text": f"{x['input']} {x['response']}"}
-    )
+    def build_text(x):
+        prompt = build_prompt(x)
+        return {"input": prompt, "text": f"{prompt} {x['answer'] or ''}"}
+
+    dataset = dataset.map(build_text)
     return dataset 
 
 def tokenize(batch:Dict, tokenizer)-> Dict:
-    return tokenizer([text + tokenizer.eos_token for text in batch["text"]],
+    tokens = tokenizer([text + tokenizer.eos_token for text in batch["text"]],
     truncation = True)
+    # Stored so the length-grouped sampler does not re-measure every row
+    tokens["length"] = [len(ids) for ids in tokens["input_ids"]]
+    return tokens
 
 def create_dataset(data_path, tokenizer)-> DatasetDict:
     dataset = load_dataset(
@@ -31,25 +61,226 @@ def create_dataset(data_path, tokenizer)-> DatasetDict:
 
     # Tokenize dataset
     dataset = dataset.map(
-        lambda x: tokenize(x, tokenizer=tokenizer)
+        lambda x: tokenize(x, tokenizer=tokenizer),
         batched=True
     )
     return dataset 
 
-def generate_response(data, model, tokenizer):
+def dtype_kwargs(dtype=torch.float32) -> Dict:
+    # transformers 4.56 renamed torch_dtype to dtype and warns on the old name
+    major, minor = (int(part) for part in transformers.__version__.split(".")[:2])
+    return {"dtype" if (major, minor) >= (4, 56) else "torch_dtype": dtype}
+
+def build_training_arguments(args: Dict) -> TrainingArguments:
+    args = dict(args)
+    # transformers 5 replaced group_by_length with train_sampling_strategy
+    if "group_by_length" not in inspect.signature(TrainingArguments).parameters:
+        if args.pop("group_by_length", False):
+            args["train_sampling_strategy"] = "group_by_length"
+    return TrainingArguments(**args)
+
+class CausalLMCollator:
+    """
+    Pads each batch only to its own longest row and copies input_ids to
+    labels, masking padding by attention_mask.
+
+    DataCollatorForLanguageModeling masks every label equal to pad_token_id.
+    Qwen2.5 pads with its EOS token, so the EOS appended by tokenize() would
+    never be learned and the model would not learn to stop.
+    """
+
+    def __init__(self, tokenizer, pad_to_multiple_of: int = 8):
+        self.tokenizer = tokenizer
+        self.pad_to_multiple_of = pad_to_multiple_of
+
+    def __call__(self, features):
+        batch = self.tokenizer.pad(
+            [{"input_ids": f["input_ids"], "attention_mask": f["attention_mask"]} for f in features],
+            padding=True,
+            pad_to_multiple_of=self.pad_to_multiple_of,
+            return_tensors="pt"
+        )
+        labels = batch["input_ids"].clone()
+        labels[batch["attention_mask"] == 0] = -100
+        batch["labels"] = labels
+        return batch
+
+class PaddingStatsTrainer(Trainer):
+    """
+    Trainer that logs the share of padded tokens in the training batches:
+    padding_ratio once per epoch, and recent_padding_ratio with each regular
+    training log entry.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_epoch = 0
+        self.real_tokens = 0
+        self.total_tokens = 0
+        self.recent_real_tokens = 0
+        self.recent_total_tokens = 0
+
+    def _get_train_sampler(self, *args, **kwargs):
+        # Newer versions hand over the dataset after unused columns were
+        # removed, which drops "length", so the sampler would re-measure it
+        if args or kwargs:
+            return super()._get_train_sampler(self.train_dataset)
+        return super()._get_train_sampler()
+
+    def training_step(self, model, inputs, *args, **kwargs):
+        # state.epoch reaches the next whole number after the last step of an epoch
+        epoch = int(self.state.epoch or 0)
+        if epoch > self.stats_epoch:
+            self.log_epoch_padding()
+            self.stats_epoch = epoch
+
+        # Counted here, in the main process, since collation may run in workers
+        mask = inputs.get("attention_mask")
+        if mask is not None:
+            real, total = int(mask.sum()), mask.numel()
+            self.real_tokens += real
+            self.total_tokens += total
+            self.recent_real_tokens += real
+            self.recent_total_tokens += total
+        return super().training_step(model, inputs, *args, **kwargs)
+
+    def log_epoch_padding(self):
+        if self.total_tokens:
+            self.log({
+                "padding_ratio": 1 - self.real_tokens / self.total_tokens,
+                "tokens_per_epoch": self.total_tokens,
+            })
+        self.real_tokens = 0
+        self.total_tokens = 0
+
+    def log(self, logs, *args, **kwargs):
+        if "train_loss" in logs:
+            # Training is over, so the last epoch will not see another step
+            self.log_epoch_padding()
+        elif "loss" in logs and self.recent_total_tokens:
+            logs["recent_padding_ratio"] = 1 - self.recent_real_tokens / self.recent_total_tokens
+            self.recent_real_tokens = 0
+            self.recent_total_tokens = 0
+        super().log(logs, *args, **kwargs)
+
+def checkpoint_fingerprint(model_name: str) -> str:
+    """
+    Identify the exact weights behind model_name: the size and mtime of the
+    config and weight files of a local checkpoint, or the snapshot commit of
+    a Hub model. Retraining into the same directory changes the fingerprint.
+    """
+    digest = hashlib.sha256()
+    path = Path(model_name)
+    if path.is_dir():
+        for file in sorted(path.iterdir()):
+            if file.name == "config.json" or file.suffix in {".safetensors", ".bin"}:
+                stat = file.stat()
+                digest.update(f"{file.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    else:
+        from transformers.utils import cached_file
+
+        # Hub files live in snapshots/<commit>/, so the commit names the weights
+        digest.update(Path(cached_file(model_name, "config.json")).parent.name.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def quantized_cache_path(model_name: str, cache_dir: Path = quantized_cache_dir) -> Path:
+    # Module names in the state dict can change between library versions
+    safe_name = str(model_name).strip("/").replace("/", "--")
+    versions = f"torch{torch.__version__}-transformers{transformers.__version__}"
+    return Path(cache_dir) / f"{safe_name}-{checkpoint_fingerprint(model_name)}-int8-{versions}.pt"
+
+def quantize_model(model):
+    # In place: a copy would hold the fp32 and int8 weights at the same time
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+def load_model(model_name: str, quantize: bool = False, cache_dir: Path = quantized_cache_dir):
+    """
+    Load a causal LM and its tokenizer for CPU generation.
+
+    With quantize=True the nn.Linear layers are dynamically quantized to int8
+    (weights stored as int8, activations quantized on the fly). The quantized
+    state dict is cached on disk, so later loads skip both the fp32 load and
+    the quantization pass.
+    """
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    # Decoder-only models must be left padded for batched generation
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    if not quantize:
+        model = AutoModelForCausalLM.from_pretrained(model_name, **dtype_kwargs())
+        return model.eval(), tokenizer
+
+    cache_path = quantized_cache_path(model_name, cache_dir)
+    if cache_path.exists():
+        # Rebuild the quantized module tree, then fill it with the cached int8 weights.
+        # The fp32 skeleton is overwritten anyway, so skip its random init
+        config = AutoConfig.from_pretrained(model_name)
+        with no_init_weights():
+            skeleton = AutoModelForCausalLM.from_config(config, **dtype_kwargs())
+        model = quantize_model(skeleton.eval())
+        model.load_state_dict(torch.load(cache_path, weights_only=True, mmap=True))
+        return model, tokenizer
+
+    model = AutoModelForCausalLM.from_pretrained(model_name, **dtype_kwargs()).eval()
+    model = quantize_model(model)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    torch.save(model.state_dict(), tmp_path)
+    tmp_path.replace(cache_path)
+    return model, tokenizer
+
+def generate(
+    prompts,
+    model,
+    tokenizer,
+    max_new_tokens=256,
+    repetition_penalty=1.5,
+    **generation_kwargs
+):
+    """
+    Generate for one prompt or a batch of prompts; shared by the sample
+    export, the quantization comparison and the generation sweep.
+
+    Return: Tuple[torch.Tensor, int] of prompt + generated token ids and the
+    (padded) prompt length, so output[:, prompt_length:] are the new tokens
+    """
+    # Text to tokens
+    tokens = tokenizer(prompts, truncation=True, padding=True, return_tensors="pt")
+
+    # Generate answers 
+    with torch.inference_mode():
+        output = model.generate(
+            input_ids=tokens["input_ids"],
+            attention_mask=tokens["attention_mask"],
+            max_new_tokens = max_new_tokens,
+            repetition_penalty = repetition_penalty,
+            **generation_kwargs
+        )
+    return output, tokens["input_ids"].shape[1]
+
+def generate_response(
+    data,
+    model,
+    tokenizer,
+    output_path="export_samples.txt",
+    max_new_tokens=256,
+    repetition_penalty=1.5,
+    **generation_kwargs
+):
     all_responses = []
     for batch in data:
-        # Text to tokens
-        tokens = tokenizer(batch["input"], truncation=True)
-        input_ids_tensor = tokens["input_ids"]
-        attention_mask_tensor = tokens["attention_mask"]
-
-        # Generate answers 
-        batch_generations_ids = model.generate(
-            input_ids_tensor,
-            attention_mask_tensor,
-            max_new_tokens = 256,
-            repetition_penalty = 1.5
+        batch_generations_ids, _ = generate(
+            batch["input"],
+            model,
+            tokenizer,
+            max_new_tokens=max_new_tokens,
+            repetition_penalty=repetition_penalty,
+            **generation_kwargs
         )
 
         # Decode generated tokens 
@@ -60,32 +291,48 @@ def generate_response(data, model, tokenizer):
         all_responses.extend(batch_generation)
 
     # Final export as txt file
-    with open("export_samples.txt", "w") as f:
+    with open(output_path, "w") as f:
         for line in all_responses:
             f.write(line + "\n")
 
+    return all_responses
+
 
 def main():
 
-    training_args = {"learning_rate": 1e-5,
-                     "num_train_epoch": 1,
-                     "per_device_train_batch_size": 4}
+    num_workers = min(4, os.cpu_count() or 1)
+    training_args = {"output_dir": "checkpoints",
+                     "learning_rate": 1e-5,
+                     "num_train_epochs": 1,
+                     "per_device_train_batch_size": 4,
+                     # Batch rows of similar length together to cut padding
+                     "group_by_length": True,
+                     "length_column_name": "length",
+                     # Collate and prefetch batches in background workers
+                     "dataloader_num_workers": num_workers,
+                     "dataloader_prefetch_factor": 2,
+                     "dataloader_persistent_workers": True,
+                     "dataloader_pin_memory": torch.cuda.is_available()}
 
     tokenizer = AutoTokenizer.from_pretrained(model_id)
-    model = AutoModelForCausalLM.from_pretrainer(model_id)
+    model = AutoModelForCausalLM.from_pretrained(model_id)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
 
-    data_path = "data"
     # 1. Load and preprocess dataset 
     dataset = create_dataset(data_path, tokenizer)
 
     # 2. Initiate callbacks 
     callbacks = [WandbCallback()]
 
+    collator = CausalLMCollator(tokenizer, pad_to_multiple_of=8)
+
     # 3. Instantiate Huggingface Trainer for model training
-    trainer = Trainer(
+    trainer = PaddingStatsTrainer(
         model = model,
-        tokenizer = tokenizer,
-        args = training_args,
+        args = build_training_arguments(training_args),
+        processing_class = tokenizer,
+        data_collator = collator,
         train_dataset = dataset["train"],
         eval_dataset = dataset["val"],
         callbacks = callbacks
@@ -95,4 +342,8 @@ def main():
     trainer.train() 
 
     # 5. Generate Sample response 
-    generate_sample_response(dataset["val"], model, tokenizer)
+    generate_response(dataset["val"], model, tokenizer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Answer the test questions with a local model and write the sample output
+JSONL that data/generated_output/jsonl_to_csv.py turns into an arena CSV.
+
+Prompts are built like the finetuning inputs (question plus few-shot
+examples), one JSON line per question with id, prompt, prediction and label.
+
+Usage:
+    python generate_samples.py --model Qwen/Qwen2.5-0.5B \
+        --output data/generated_output/Qwen25-05B_sample_output.jsonl
+"""
+import argparse
+import json
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate sample answers with a local model")
+    parser.add_argument("--model", required=True, help="Model id or local checkpoint")
+    parser.add_argument("--output", required=True, help="JSONL file to write")
+    parser.add_argument(
+        "--questions",
+        default="resto_new_test.csv",
+        help="QA CSV with question, example_1, example_2 and answer columns"
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Only answer the first N questions")
+    parser.add_argument("--quantize", action="store_true", help="Generate with the int8 model")
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    parser.add_argument("--repetition-penalty", type=float, default=1.5)
+    args = parser.parse_args()
+
+    # Heavy imports only once there is something to generate
+    import pandas as pd
+    from finetuning import build_prompt, generate, load_model
+
+    rows = pd.read_csv(args.questions, encoding="utf-8-sig").fillna("")
+    if args.limit:
+        rows = rows.head(args.limit)
+    model, tokenizer = load_model(args.model, quantize=args.quantize)
+
+    output_path = Path(args.output)
+    tmp_path = output_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for i, row in enumerate(rows.to_dict("records")):
+            prompt = build_prompt(row)
+            output, prompt_length = generate(
+                prompt,
+                model,
+                tokenizer,
+                max_new_tokens=args.max_new_tokens,
+                repetition_penalty=args.repetition_penalty
+            )
+            prediction = tokenizer.decode(output[0, prompt_length:], skip_special_tokens=True)
+            sample = {"id": i, "prompt": prompt, "prediction": prediction, "label": row["answer"]}
+            f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+            print(f"Generated {i + 1}/{len(rows)}", end="\r")
+    print()
+    # Only replace the previous samples once every question is answered
+    tmp_path.replace(output_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,175 @@
-from openai import OpenAI
-import pandas as pd
+import argparse
+import json
 import time
 from datetime import datetime
 
-client = OpenAI()
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
 
-qb = pd.read_csv("testset_questions_only.csv")
-qb_list = qb['question'].to_list()
-test_question = qb_list[1]
+def chat_request(prompt, model="gpt-4o", max_tokens=500, temperature=0.7):
+    """Request body shared by the synchronous, batch and sweep modes"""
+    return dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant. Please provide your answer in Cantonese"},
+            {
+                "role": "user",
+                "content": f"{prompt}"
+            }
+        ],
+        max_tokens = max_tokens,
+        temperature = temperature
+    )
 
-def API_call(client, prompt):
+def API_call(client, prompt, **params):
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant. Please provide your answer in Cantonese"},
-                {
-                    "role": "user",
-                    "content": f"{prompt}"
-                }
-            ],
-            max_tokens = 500,
-            temperature = 0.7
-        )
+        completion = client.chat.completions.create(**chat_request(prompt, **params))
         return completion.choices[0].message.content
     except Exception as e:
         print(f"Error processing prompt: {prompt[:50]}...")
         print(f"Error: {str(e)}")
         raise
 
-qa = qb.copy()
-answers = []
-total = len(qb_list)
+def answer_sync(client, qb_list):
+    answers = []
+    total = len(qb_list)
 
-for i, question in enumerate(qb_list):
-    try:
-        answer = API_call(client,question)
-        answers.append(answer)
-        print(f"Process {i+1}/{total} questions")
-        time.sleep(0.5)
-    except Exception as e:
-        answers.append(f"Error: {str(e)}")
-        print(f"Failed to process question {i+1}")
+    for i, question in enumerate(qb_list):
+        try:
+            answer = API_call(client,question)
+            answers.append(answer)
+            print(f"Process {i+1}/{total} questions")
+            time.sleep(0.5)
+        except Exception as e:
+            answers.append(f"Error: {str(e)}")
+            print(f"Failed to process question {i+1}")
+
+    return answers
+
+def write_batch_requests(qb_list, path):
+    """Write one chat completion request per question, keyed by row position"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, question in enumerate(qb_list):
+            request = {
+                "custom_id": f"question-{i}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": chat_request(question),
+            }
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+    return path
+
+def submit_batch(client, path):
+    with open(path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h"
+    )
+    print(f"Submitted batch {batch.id} with input file {batch_file.id}")
+    return batch
+
+def wait_for_batch(client, batch_id, poll_interval=60):
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts is not None:
+            print(f"Batch {batch_id}: {batch.status} ({counts.completed}/{counts.total} done, {counts.failed} failed)")
+        else:
+            print(f"Batch {batch_id}: {batch.status}")
+        if batch.status in BATCH_FINAL_STATES:
+            return batch
+        time.sleep(poll_interval)
+
+def read_batch_answers(client, batch, total):
+    """
+    Map batch results back to question positions.
+
+    Questions without a successful result get an "Error: ..." answer, the
+    same as failed calls in the synchronous mode.
+    """
+    answers = [f"Error: no result (batch {batch.status})"] * total
+
+    for file_id in (batch.error_file_id, batch.output_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            i = int(result["custom_id"].split("-", 1)[1])
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                error = result.get("error") or response.get("body", {}).get("error")
+                answers[i] = f"Error: {error}"
+            else:
+                answers[i] = response["body"]["choices"][0]["message"]["content"]
+
+    return answers
+
+def answer_batch(client, qb_list, requests_path, poll_interval=60):
+    write_batch_requests(qb_list, requests_path)
+    batch = submit_batch(client, requests_path)
+    batch = wait_for_batch(client, batch.id, poll_interval=poll_interval)
+    return read_batch_answers(client, batch, len(qb_list))
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer the test questions with GPT-4o")
+    parser.add_argument(
+        "--questions",
+        default="testset_questions_only.csv",
+        help="CSV file with a 'question' column"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Output CSV (default: OpenAI_qa_<timestamp>.csv)"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all questions through the Batch API and wait for the results"
+    )
+    parser.add_argument(
+        "--batch-requests",
+        default="batch_requests.jsonl",
+        help="Where to write the batch request JSONL"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=60,
+        help="Seconds between batch status checks"
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="API base URL, e.g. a local fake of the files/batches endpoints"
+    )
+    args = parser.parse_args()
+
+    # Imported here so that importing this module or running --help stays fast
+    import pandas as pd
+    from openai import OpenAI
+
+    client = OpenAI(base_url=args.base_url)
+
+    qb = pd.read_csv(args.questions)
+    qb_list = qb['question'].to_list()
+
+    qa = qb.copy()
+    if args.batch:
+        answers = answer_batch(client, qb_list, args.batch_requests, poll_interval=args.poll_interval)
+    else:
+        answers = answer_sync(client, qb_list)
+
+    qa["Answers"] = answers
 
-qa["Answers"] = answers
+    if args.output is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        args.output = f"OpenAI_qa_{timestamp}.csv"
+    qa.to_csv(args.output, index=False)
 
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-qa.to_csv(f"OpenAI_qa_{timestamp}.csv", index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
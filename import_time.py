@@ -0,0 +1,108 @@
+"""
+Import-time benchmark for the Streamlit app and CLI scripts.
+
+Each target is imported in a fresh interpreter with `python -X importtime`,
+so the numbers match a cold start. The report shows the total import time
+of every target, its heaviest imports, and how long `--help` takes for the
+scripts.
+
+Usage:
+    python import_time.py                # print the report
+    python import_time.py --budget-ms 300 # exit non-zero if a target is slower
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# (module, directory it is run from)
+IMPORT_TARGETS = [
+    ("main", "streamlit"),
+    ("gpt_prompt", "."),
+    ("qa_generators_v2", "."),
+    ("pipeline", "."),
+]
+
+HELP_TARGETS = ["gpt_prompt.py", "pipeline.py", "qa_generators_v2.py"]
+
+
+def import_times(module: str, cwd: str):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: (total ms, list of (cumulative ms, top-level package)), or None on failure
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT / cwd,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return None
+
+    # A package is reported after everything it imported, so direct imports
+    # of the target are the depth-2 lines just before its own depth-1 line
+    total_ms = 0.0
+    children, heaviest = [], []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2 + 1
+        ms = int(cumulative) / 1000
+        if depth == 2:
+            children.append((ms, name.strip()))
+        elif depth == 1:
+            if name.strip() == module:
+                total_ms, heaviest = ms, sorted(children, reverse=True)
+            children = []
+
+    return total_ms, heaviest
+
+
+def help_time(script: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, script, "--help"],
+        cwd=ROOT,
+        capture_output=True
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app and scripts")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports listed per target")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if a target imports slower than this")
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"{'target':<20} {'import ms':>10}  heaviest imports")
+    for module, cwd in IMPORT_TARGETS:
+        times = import_times(module, cwd)
+        if times is None:
+            print(f"{module:<20} {'failed':>10}  (missing dependencies?)")
+            continue
+        total_ms, heaviest = times
+        top = ", ".join(f"{name} {ms:.0f}ms" for ms, name in heaviest[:args.top])
+        print(f"{module:<20} {total_ms:>10.1f}  {top}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            over_budget.append(module)
+
+    print()
+    for script in HELP_TARGETS:
+        print(f"{script + ' --help':<30} {help_time(script):>8.1f} ms")
+
+    if over_budget:
+        print(f"\nOver the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
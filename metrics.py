@@ -0,0 +1,36 @@
+"""Automatic quality scores for generated Cantonese answers"""
+from collections import Counter
+
+
+def char_ngrams(text: str, n: int = 2) -> Counter:
+    """Character n-grams ignoring whitespace; Chinese text has no word boundaries"""
+    text = "".join(str(text).split())
+    if len(text) < n:
+        return Counter([text]) if text else Counter()
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def char_ngram_f1(prediction: str, reference: str, n: int = 2) -> float:
+    """F1 of overlapping character n-grams between a prediction and a reference"""
+    pred, ref = char_ngrams(prediction, n), char_ngrams(reference, n)
+    overlap = sum((pred & ref).values())
+    if overlap == 0:
+        return 0.0
+    precision = overlap / sum(pred.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def distinct_ngram_ratio(text: str, n: int = 2) -> float:
+    """Unique share of character n-grams; low values mean repetitive output"""
+    grams = char_ngrams(text, n)
+    total = sum(grams.values())
+    return len(grams) / total if total else 0.0
+
+
+def cjk_ratio(text: str) -> float:
+    """Share of non-space characters that are CJK ideographs, a cheap on-language check"""
+    chars = [c for c in str(text) if not c.isspace()]
+    if not chars:
+        return 0.0
+    return sum("一" <= c <= "鿿" for c in chars) / len(chars)
@@ -0,0 +1,304 @@
+"""
+Run the data pipeline as a DAG of stages with content-hash caching.
+
+Each stage declares the files it reads, the files it writes and the code it
+depends on. A stage is skipped when the fingerprint of its command, inputs
+and code matches the last successful run and its outputs are unchanged, so
+editing one model's outputs only re-runs the stages downstream of it.
+Stages whose dependencies are satisfied run in parallel.
+
+Usage:
+    python pipeline.py                 # run every stage that is out of date
+    python pipeline.py convert-Qwen25-05B --jobs 4
+    python pipeline.py --list
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent
+CACHE_PATH = ROOT / ".pipeline_cache.json"
+
+# Local model sample outputs -> (model, arena name). Each is generated and
+# then converted into data/q_and_a/<arena name>.csv, which the app reads.
+# The finetuned checkpoint comes from a finetuning.py run, which is not a
+# pipeline stage.
+GENERATED_OUTPUTS = {
+    "qwen25-3B-finetuned-sample-output.jsonl": ("checkpoints/qwen25-3B-finetuned", "Qwen25-3B"),
+    "Qwen25-05B_sample_output.jsonl": ("Qwen/Qwen2.5-0.5B", "Qwen25-05B"),
+    "Qwen25-15B_sample_output.jsonl": ("Qwen/Qwen2.5-1.5B", "Qwen25-15B"),
+}
+
+
+@dataclass
+class Stage:
+    """A pipeline step; all paths are relative to the repository root"""
+    name: str
+    command: List[str]
+    cwd: str = "."
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    code: List[str] = field(default_factory=list)
+
+
+def default_stages() -> List[Stage]:
+    stages = [
+        Stage(
+            name="scrape",
+            command=[sys.executable, "../Scraper/scraper.py"],
+            cwd="data",
+            outputs=["data/restaurants.json"],
+            code=["Scraper/scraper.py"],
+        ),
+        Stage(
+            name="districts",
+            command=[sys.executable, "json_manipulation.py"],
+            cwd="data_cleaning",
+            inputs=["data/restaurants.json"],
+            outputs=["data/restaurants_d.json", "data/restaurants_d.parquet"],
+            code=[
+                "data_cleaning/json_manipulation.py",
+                "data_cleaning/file_source.py",
+                "data_cleaning/instrumentation.py",
+            ],
+        ),
+        # qa_generators_v2 performs the train/test split itself via split_data_sklearn
+        Stage(
+            name="qa",
+            command=[sys.executable, "qa_generators_v2.py"],
+            inputs=["data/restaurants_d.json", "data/restaurants_d.parquet"],
+            outputs=[
+                "resto_new_train.csv",
+                "resto_new_test.csv",
+                "resto_new_train.parquet",
+                "resto_new_test.parquet",
+            ],
+            code=[
+                "qa_generators_v2.py",
+                "data_cleaning/split_data.py",
+                "data_cleaning/near_duplicates.py",
+                "data_cleaning/embedding_index.py",
+                "data_cleaning/file_source.py",
+                "data_cleaning/instrumentation.py",
+            ],
+        ),
+        Stage(
+            name="questions",
+            command=[sys.executable, "export_questions.py"],
+            cwd="data_cleaning",
+            inputs=["resto_new_test.csv"],
+            outputs=["data/q_and_a/testset_questions_only.csv"],
+            code=[
+                "data_cleaning/export_questions.py",
+                "data_cleaning/file_source.py",
+                "data_cleaning/instrumentation.py",
+            ],
+        ),
+        Stage(
+            name="answer-gpt4o",
+            command=[sys.executable, "../../gpt_prompt.py", "--output", "gpt4o.csv"],
+            cwd="data/q_and_a",
+            inputs=["data/q_and_a/testset_questions_only.csv"],
+            outputs=["data/q_and_a/gpt4o.csv"],
+            code=["gpt_prompt.py"],
+        ),
+    ]
+
+    for jsonl, (model_name, arena_name) in GENERATED_OUTPUTS.items():
+        stages.append(Stage(
+            name=f"generate-{arena_name}",
+            command=[
+                sys.executable, "generate_samples.py",
+                "--model", model_name,
+                "--output", f"data/generated_output/{jsonl}",
+            ],
+            inputs=["resto_new_test.csv"],
+            outputs=[f"data/generated_output/{jsonl}"],
+            code=["generate_samples.py", "finetuning.py"],
+        ))
+        stages.append(Stage(
+            name=f"convert-{arena_name}",
+            command=[sys.executable, "jsonl_to_csv.py", jsonl, "--output", f"../q_and_a/{arena_name}.csv"],
+            cwd="data/generated_output",
+            inputs=[f"data/generated_output/{jsonl}"],
+            outputs=[f"data/q_and_a/{arena_name}.csv"],
+            code=["data/generated_output/jsonl_to_csv.py", "data_cleaning/instrumentation.py"],
+        ))
+
+    return stages
+
+
+def file_digest(path: Path) -> str:
+    if not path.exists():
+        return "missing"
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(stage: Stage, root: Path = ROOT) -> str:
+    """Hash of the stage's command, working directory, inputs and code"""
+    digest = hashlib.sha256()
+    # The interpreter path varies between machines, so only the arguments count
+    digest.update(json.dumps([stage.command[1:], stage.cwd]).encode("utf-8"))
+    for path in sorted(stage.inputs) + sorted(stage.code):
+        digest.update(f"{path}:{file_digest(root / path)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    Schedules stages by their file dependencies and records what ran.
+    Stage paths are resolved against root.
+    """
+
+    def __init__(self, stages: List[Stage], cache_path: Path = CACHE_PATH, root: Path = ROOT):
+        self.stages = {stage.name: stage for stage in stages}
+        self.root = Path(root)
+        self.cache_path = cache_path
+        self.cache = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+        self._lock = threading.Lock()
+
+        producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(f"{output} is produced by both {producers[output]} and {stage.name}")
+                producers[output] = stage.name
+        self.upstream = {
+            stage.name: sorted({producers[i] for i in stage.inputs if i in producers})
+            for stage in stages
+        }
+
+    def closure(self, targets: List[str]) -> List[str]:
+        """Targets plus every stage they depend on"""
+        selected, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name}")
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self.upstream[name])
+        return sorted(selected)
+
+    def is_fresh(self, stage: Stage) -> bool:
+        record = self.cache.get(stage.name)
+        if record is None or record["fingerprint"] != fingerprint(stage, self.root):
+            return False
+        return all(
+            file_digest(self.root / output) == record["outputs"].get(output)
+            for output in stage.outputs
+        )
+
+    def _record(self, stage: Stage):
+        with self._lock:
+            self.cache[stage.name] = {
+                "fingerprint": fingerprint(stage, self.root),
+                "outputs": {o: file_digest(self.root / o) for o in stage.outputs},
+            }
+            self.cache_path.write_text(json.dumps(self.cache, indent=2, sort_keys=True))
+
+    def _run_stage(self, stage: Stage, force: bool, dry_run: bool) -> str:
+        if not force and self.is_fresh(stage):
+            return "cached"
+        if dry_run:
+            return "would run"
+
+        print(f"[{stage.name}] {' '.join(stage.command[1:])}", flush=True)
+        result = subprocess.run(stage.command, cwd=self.root / stage.cwd)
+        if result.returncode != 0:
+            return f"failed ({result.returncode})"
+        self._record(stage)
+        return "ran"
+
+    def run(self, targets: List[str] = None, jobs: int = 1, force: bool = False,
+            dry_run: bool = False) -> Dict[str, str]:
+        """
+        Run the selected stages, starting each one as soon as its upstream
+        stages have finished.
+
+        Returns:
+            dict: Status of each selected stage
+        """
+        selected = self.closure(targets or list(self.stages))
+        status = {}
+        running = {}
+
+        def set_status(name, value):
+            status[name] = value
+            print(f"[{name}] {value}", flush=True)
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while len(status) < len(selected):
+                settled = len(status)
+                for name in selected:
+                    if name in status or name in running.values():
+                        continue
+                    upstream = self.upstream[name]
+                    if any(status.get(u, "").startswith(("failed", "blocked")) for u in upstream):
+                        set_status(name, "blocked")
+                    elif dry_run and any(status.get(u) == "would run" for u in upstream):
+                        set_status(name, "would run")
+                    elif all(u in status for u in upstream):
+                        future = pool.submit(self._run_stage, self.stages[name], force, dry_run)
+                        running[future] = name
+
+                if not running:
+                    # Statuses settled without running may unblock stages earlier in the order
+                    if len(status) > settled:
+                        continue
+                    if len(status) < len(selected):
+                        raise RuntimeError("Stages depend on each other in a cycle")
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    set_status(running.pop(future), future.result())
+
+        return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the data pipeline, skipping up-to-date stages")
+    parser.add_argument("targets", nargs="*", help="Stages to run, with their upstream stages")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of stages run in parallel")
+    parser.add_argument("--force", action="store_true", help="Run stages even if they are up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages would run")
+    parser.add_argument("--list", action="store_true", help="List stages and their dependencies")
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Write per-stage timing/memory reports and cProfile dumps to DIR"
+    )
+    args = parser.parse_args()
+
+    if args.profile:
+        # Stages run in their own directories, so hand them an absolute path
+        os.environ["PIPELINE_PROFILE"] = str(Path(args.profile).resolve())
+
+    pipeline = Pipeline(default_stages())
+
+    if args.list:
+        for name, stage in pipeline.stages.items():
+            state = "up to date" if pipeline.is_fresh(stage) else "out of date"
+            after = ", ".join(pipeline.upstream[name]) or "-"
+            print(f"{name:<42} {state:<12} after: {after}")
+        return
+
+    status = pipeline.run(args.targets, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    if any(s.startswith(("failed", "blocked")) for s in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
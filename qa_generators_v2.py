@@ -1,10 +1,25 @@
+from __future__ import annotations
+
+import os
+import re
 import json
-import pandas as pd
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+from data_cleaning import file_source
+from data_cleaning.instrumentation import merge_records, stage, take_records, timed
 from data_cleaning.split_data import split_data_sklearn
+from data_cleaning.near_duplicates import MinHashLSH, build_index
+from data_cleaning.embedding_index import EmbeddingIndex, top_k_neighbors
 
+# pandas is imported by the entry point, keeping `--help` and imports fast
+if TYPE_CHECKING:
+    import pandas as pd
 
-# To deprioritise used restaurants to ensure diversity
-used_restaurants = set()
 
 def get_similar_restaurants(
         train_df: pd.DataFrame,
@@ -13,10 +28,13 @@ def get_similar_restaurants(
         used_restaurants: set,
         num_examples: int = 2,
         iteration: int = 0,
-        based_random_state: int = 42
+        based_random_state: int = 42,
+        excluded_restaurants: set = None
 ):
     cuisine_df = train_df[train_df['菜式'] == cuisine].copy()
     cuisine_df = cuisine_df[cuisine_df["餐廳名稱"] != target_restaurants]
+    if excluded_restaurants:
+        cuisine_df = cuisine_df[~cuisine_df["餐廳名稱"].isin(excluded_restaurants)]
 
     if len(cuisine_df) == 0:
         return [] 
@@ -27,26 +45,80 @@ def get_similar_restaurants(
 
     return cuisine_df.head(num_examples)[['餐廳名稱','描述']].to_dict('records')
 
+@timed()
+def get_semantic_restaurants(
+        train_df: pd.DataFrame,
+        test_df: pd.DataFrame,
+        embedding_index: EmbeddingIndex,
+        num_examples: int = 2,
+        excluded_restaurants: list = None
+):
+    """
+    Retrieve the most similar training restaurants for every row of test_df
+    by description embedding, with cuisine as a filter and fallback.
+
+    All targets are scored against the training matrix in one multiply.
+    excluded_restaurants optionally holds one set of names per test_df row.
+
+    Return: List[List[Dict]] with one list of examples per test_df row
+    """
+    train_texts = train_df['描述'].fillna('').tolist()
+    if test_df is train_df:
+        train_vectors = query_vectors = embedding_index.build(train_texts)
+    else:
+        vectors = embedding_index.build(train_texts + test_df['描述'].fillna('').tolist())
+        train_vectors, query_vectors = vectors[:len(train_df)], vectors[len(train_df):]
+
+    name_positions = {}
+    for i, name in enumerate(train_df["餐廳名稱"]):
+        name_positions.setdefault(name, []).append(i)
+    empty = {i for i, text in enumerate(train_texts) if not text}
+
+    exclude = []
+    for row, name in enumerate(test_df["餐廳名稱"]):
+        banned = {name} | set(excluded_restaurants[row] or ()) if excluded_restaurants else {name}
+        exclude.append(empty | {i for n in banned for i in name_positions.get(n, [])})
+
+    neighbors = top_k_neighbors(
+        query_vectors,
+        train_vectors,
+        test_df['菜式'].tolist(),
+        train_df['菜式'].tolist(),
+        k=num_examples,
+        exclude=exclude
+    )
+    return [
+        train_df.iloc[positions][['餐廳名稱','描述']].to_dict('records')
+        for positions in neighbors
+    ]
+
 def generate_context(
     train_df: pd.DataFrame,
     restaurant: pd.Series,
     used_restaurants: set,
     iteration: int = 0,
-    random_state: int = 42
+    random_state: int = 42,
+    excluded_restaurants: set = None,
+    similar_restaurants: list = None
 ) -> str:
     
-    similar_restaurants = get_similar_restaurants(
-        train_df=train_df,
-        cuisine=restaurant["菜式"],
-        target_restaurants=restaurant["餐廳名稱"],
-        used_restaurants=used_restaurants,
-        iteration = iteration,
-        based_random_state = random_state
-    )
+    if similar_restaurants is None:
+        similar_restaurants = get_similar_restaurants(
+            train_df=train_df,
+            cuisine=restaurant["菜式"],
+            target_restaurants=restaurant["餐廳名稱"],
+            used_restaurants=used_restaurants,
+            iteration = iteration,
+            based_random_state = random_state,
+            excluded_restaurants = excluded_restaurants
+        )
 
     used_restaurants.update(r["餐廳名稱"] for r in similar_restaurants)
 
-    # Context Generation
+    return format_examples(similar_restaurants)
+
+def format_examples(similar_restaurants: list) -> list:
+    """Context lines for the picked examples, skipping those without a description"""
     contex_parts = []
     for i, similar in enumerate(similar_restaurants):
         if similar["描述"]:
@@ -56,15 +128,27 @@ def generate_context(
         
     return contex_parts
 
+def build_qa_pair(restaurant, example_1: str, example_2: str) -> dict:
+    return {
+        'question': f"請你提供這個在於香港{restaurant['地區']}的餐廳的描述: {restaurant['餐廳名稱']}, 這是一間{restaurant['菜式']}餐廳。",
+        'example_1': example_1,
+        'example_2': example_2,
+        'answer': restaurant['描述']
+    }
+
 def retrieve_qa_pairs(
     train_df: pd.DataFrame,
     restaurant: pd.Series,
     used_restaurants: set,
     iteration: int = 0,
-    random_state: int = 42
+    random_state: int = 42,
+    excluded_restaurants: set = None,
+    similar_restaurants: list = None
 ):
     """
-    Look up similar pairs and based on given restaurant details
+    Look up similar pairs and based on given restaurant details.
+    Restaurants in excluded_restaurants are never used as examples.
+    Precomputed similar_restaurants (semantic mode) skip the cuisine lookup.
 
     Return: Tuple[Str, Str]
     """
@@ -75,7 +159,9 @@ def retrieve_qa_pairs(
         restaurant=restaurant,
         used_restaurants=used_restaurants,
         iteration=iteration,
-        random_state=random_state
+        random_state=random_state,
+        excluded_restaurants=excluded_restaurants,
+        similar_restaurants=similar_restaurants
     )
     
     # Split context into examples if they exist
@@ -84,24 +170,81 @@ def retrieve_qa_pairs(
 
     return (example_1, example_2) 
 
+@timed()
+def prepare_retrieval(
+    train_df: pd.DataFrame,
+    test_df: pd.DataFrame,
+    dedup_index: MinHashLSH = None,
+    embedding_index: EmbeddingIndex = None
+):
+    """
+    Resolve near-duplicate exclusions and semantic examples for every test_df row.
+
+    Return: Tuple[List, List] of per-row excluded names and per-row examples
+    """
+    excluded = [None] * len(test_df)
+    if dedup_index is not None:
+        excluded = [
+            set(train_df["餐廳名稱"].iloc[dedup_index.query(description)])
+            for description in test_df['描述'].fillna('')
+        ]
+
+    semantic_examples = [None] * len(test_df)
+    if embedding_index is not None:
+        semantic_examples = get_semantic_restaurants(
+            train_df=train_df,
+            test_df=test_df,
+            embedding_index=embedding_index,
+            excluded_restaurants=excluded
+        )
+
+    return excluded, semantic_examples
+
+@timed()
 def generate_qa_pairs(
     train_df: pd.DataFrame,
     test_df: pd.DataFrame = None,
     random_state: int = 42,
     training_mode:str = "train",
+    dedup_index: MinHashLSH = None,
+    embedding_index: EmbeddingIndex = None,
+    excluded_restaurants: list = None,
+    semantic_examples: list = None,
     ):
+    """
+    Build one QA pair per restaurant in test_df (or train_df in train mode).
+
+    If dedup_index is given, it must index train_df['描述'] by position; any
+    training restaurant whose description is a near-duplicate of the target's
+    is excluded from its few-shot examples.
+
+    If embedding_index is given, few-shot examples are the nearest training
+    descriptions by embedding instead of a shuffled same-cuisine pick.
+
+    excluded_restaurants and semantic_examples accept per-row results of
+    prepare_retrieval computed ahead of time, e.g. for a single shard.
+    """
     qa_pairs = []
     cuisine_iterations = {}
+    # To deprioritise used restaurants to ensure diversity
+    used_restaurants = set()
     if training_mode == "train":
         test_df = train_df
 
-    for _, restaurant in test_df.iterrows():
+    if excluded_restaurants is None or semantic_examples is None:
+        excluded_restaurants, semantic_examples = prepare_retrieval(
+            train_df,
+            test_df,
+            dedup_index=dedup_index,
+            embedding_index=embedding_index
+        )
+
+    for position, (_, restaurant) in enumerate(test_df.iterrows()):
 
         # Skip generating the row if description is empty
         if len(restaurant['描述']) == 0:
             continue
         cuisine = restaurant['菜式']
-        area = restaurant["地區"]
         iteration = cuisine_iterations.get(cuisine, 0)
         
         example_1, example_2 = retrieve_qa_pairs(
@@ -109,54 +252,406 @@ def generate_qa_pairs(
             restaurant=restaurant,
             used_restaurants=used_restaurants,
             iteration=iteration,
-            random_state=random_state
+            random_state=random_state,
+            excluded_restaurants=excluded_restaurants[position],
+            similar_restaurants=semantic_examples[position]
         )
 
-        qa_pair = {
-            'question': f"請你提供這個在於香港{area}的餐廳的描述: {restaurant['餐廳名稱']}, 這是一間{restaurant['菜式']}餐廳。",
-            'example_1': example_1,
-            'example_2': example_2,
-            'answer': restaurant['描述']
-        }
-
-        qa_pairs.append(qa_pair)
+        qa_pairs.append(build_qa_pair(restaurant, example_1, example_2))
         cuisine_iterations[cuisine] = iteration + 1
 
     return qa_pairs
 
+def partition_by_cuisine(target_df: pd.DataFrame, num_shards: int):
+    """
+    Split row positions of target_df into shards of whole cuisines.
 
+    Cuisines are assigned largest first to the lightest shard, with ties
+    broken by name, so the partition only depends on the data itself.
 
-if __name__ == "__main__":
+    Return: List[List[int]] of row positions, each shard in ascending order
+    """
+    counts = target_df['菜式'].value_counts()
+    cuisines = sorted(counts.index, key=lambda c: (-counts[c], c))
 
-    # Load Raw Files 
-    df = pd.read_json("data/restaurants_d.json")
-    df['菜式'] = df['菜式'].apply(lambda x: x.replace("時尚",""))
-    train_df, test_df = split_data_sklearn(df)
-
-    # Generate QA pairs for training data
-    train_qa_pairs = generate_qa_pairs(train_df, training_mode="train")
-    print(f"Number of training data:{len(train_qa_pairs)}")
-    train_output_df = pd.DataFrame(train_qa_pairs)
-    train_output_df.to_csv(
-        'resto_new_train.csv',
-        index=True,
-        encoding='utf-8-sig'
+    shard_cuisines = [[] for _ in range(max(1, num_shards))]
+    shard_sizes = [0] * len(shard_cuisines)
+    for cuisine in cuisines:
+        lightest = shard_sizes.index(min(shard_sizes))
+        shard_cuisines[lightest].append(cuisine)
+        shard_sizes[lightest] += counts[cuisine]
+
+    cuisine_column = target_df['菜式'].tolist()
+    shards = []
+    for members in shard_cuisines:
+        members = set(members)
+        positions = [i for i, c in enumerate(cuisine_column) if c in members]
+        if positions:
+            shards.append(positions)
+    return shards
+
+# Per-process training frame, set once by the pool initializer
+_worker_train_df = None
+
+def _init_worker(train_df: pd.DataFrame):
+    global _worker_train_df
+    _worker_train_df = train_df
+
+def _generate_shard(shard):
+    positions, shard_df, excluded_restaurants, semantic_examples, random_state = shard
+    qa_pairs = generate_qa_pairs(
+        _worker_train_df,
+        shard_df,
+        random_state=random_state,
+        training_mode="test",
+        excluded_restaurants=excluded_restaurants,
+        semantic_examples=semantic_examples
     )
+    return list(zip(positions, qa_pairs))
+
+def _generate_shard_in_worker(shard):
+    # Workers skip atexit, so their stage timings travel back with the results
+    return _generate_shard(shard), take_records()
+
+@timed()
+def generate_qa_pairs_sharded(
+    train_df: pd.DataFrame,
+    test_df: pd.DataFrame = None,
+    random_state: int = 42,
+    training_mode: str = "train",
+    dedup_index: MinHashLSH = None,
+    embedding_index: EmbeddingIndex = None,
+    num_workers: int = 1,
+):
+    """
+    Same output as generate_qa_pairs, generated in cuisine shards across a
+    process pool.
 
-    # Generate QA Pairs for test data
-    test_qa_pairs = generate_qa_pairs(train_df,test_df, training_mode="test")
-    print(f"Number of training data:{len(test_qa_pairs)}")
-    test_qa = pd.DataFrame(test_qa_pairs)
-    test_qa.to_csv(
-        'resto_new_test.csv',
-        index=True,
-        encoding="utf-8-sig"
+    Example selection only looks at restaurants of the target's own cuisine
+    and is seeded per (cuisine, iteration), so each shard is independent of
+    the others. Results are merged back in row order, making the output
+    identical for any num_workers.
+    """
+    target_df = train_df if training_mode == "train" else test_df
+
+    # Run index lookups once in this process; the embedding cache is not shared safely
+    excluded_restaurants, semantic_examples = prepare_retrieval(
+        train_df,
+        target_df,
+        dedup_index=dedup_index,
+        embedding_index=embedding_index
     )
 
-    # Print example
+    # Drop empty descriptions up front so every shard row yields one pair
+    keep = [i for i, d in enumerate(target_df['描述'].fillna('')) if len(d) > 0]
+    target_df = target_df.iloc[keep].reset_index(drop=True)
+    excluded_restaurants = [excluded_restaurants[i] for i in keep]
+    semantic_examples = [semantic_examples[i] for i in keep]
+
+    shards = [
+        (
+            positions,
+            target_df.iloc[positions],
+            [excluded_restaurants[i] for i in positions],
+            [semantic_examples[i] for i in positions],
+            random_state,
+        )
+        for positions in partition_by_cuisine(target_df, num_workers * 4)
+    ]
+
+    if num_workers <= 1:
+        _init_worker(train_df)
+        results = [_generate_shard(shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(train_df,)
+        ) as pool:
+            results = []
+            for pairs, records in pool.map(_generate_shard_in_worker, shards):
+                results.append(pairs)
+                merge_records(records)
+
+    merged = sorted((pair for shard in results for pair in shard), key=lambda pair: pair[0])
+    return [qa_pair for _, qa_pair in merged]
+
+QA_COLUMNS = ['question', 'example_1', 'example_2', 'answer']
+
+def _name_hash(name) -> int:
+    digest = hashlib.blake2b(str(name).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+# Trailing branch suffix in the scraped names, e.g. "潮樂園 (北角)" or "潮樂園（北角）"
+BRANCH_SUFFIX = re.compile(r"\s*[(（][^()（）]*[)）]\s*$")
+
+def chain_name(name) -> str:
+    return BRANCH_SUFFIX.sub("", str(name))
+
+def is_test_restaurant(name, test_size: float = 0.2, random_state: int = 42) -> bool:
+    """
+    Train/test assignment for streamed rows, decided by the restaurant name
+    alone. The branch suffix is dropped first, so all branches of a chain
+    land on the same side.
+    """
+    key = chain_name(name)
+    digest = hashlib.blake2b(f"{random_state}:{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") / 2 ** 64 < test_size
+
+def iter_restaurant_chunks(source, chunk_size: int, test_size: float = 0.2, random_state: int = 42):
+    """Yield (chunk, is_test) for bounded-size chunks of the corpus at source"""
+    import numpy as np
+
+    columns = ["餐廳名稱", "菜式", "地區", "描述"]
+    for chunk in file_source.iter_table(source, columns=columns, chunksize=chunk_size):
+        # Parquet batches come back as categoricals; plain values keep chunks comparable
+        chunk = chunk.astype(object)
+        chunk['菜式'] = chunk['菜式'].str.replace("時尚", "", regex=False)
+        chunk['描述'] = chunk['描述'].fillna('')
+        is_test = np.fromiter(
+            (is_test_restaurant(name, test_size, random_state) for name in chunk['餐廳名稱']),
+            dtype=bool,
+            count=len(chunk)
+        )
+        yield chunk, is_test
+
+class CuisineIndex:
+    """
+    Example-retrieval index over a streamed training corpus.
+
+    Memory only holds a row id and a name hash (16 bytes) per training row,
+    grouped by cuisine. Names and descriptions are spilled to a temporary
+    SQLite file and read back only for the examples that get picked.
+    """
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(suffix=".sqlite", prefix="cuisine_index_")
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute(
+            "CREATE TABLE examples (id INTEGER PRIMARY KEY, name TEXT, description TEXT)"
+        )
+        self._ids = {}
+        self._name_hashes = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, train_chunk: pd.DataFrame):
+        names = train_chunk["餐廳名稱"].tolist()
+        ids = range(self._size, self._size + len(names))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO examples VALUES (?, ?, ?)",
+                zip(ids, names, train_chunk["描述"].tolist())
+            )
+        for row_id, name, cuisine in zip(ids, names, train_chunk["菜式"]):
+            self._ids.setdefault(cuisine, array("q")).append(row_id)
+            self._name_hashes.setdefault(cuisine, array("q")).append(_name_hash(name))
+        self._size += len(names)
+
+    def pick(self, cuisine, target_restaurant, iteration: int = 0, random_state: int = 42, num_examples: int = 2) -> list:
+        """
+        Row ids of the examples get_similar_restaurants would return: the
+        same-cuisine rows minus the target's name, shuffled with the same seed.
+        """
+        import numpy as np
+
+        if cuisine not in self._ids:
+            return []
+        ids = np.frombuffer(self._ids[cuisine], dtype=np.int64)
+        name_hashes = np.frombuffer(self._name_hashes[cuisine], dtype=np.int64)
+        candidates = ids[name_hashes != _name_hash(target_restaurant)]
+        if len(candidates) == 0:
+            return []
+        # DataFrame.sample(frac=1, random_state=seed) draws this permutation
+        order = np.random.RandomState(iteration + random_state).permutation(len(candidates))
+        return candidates[order[:num_examples]].tolist()
+
+    def lookup(self, ids) -> dict:
+        """Map row ids to {'餐廳名稱', '描述'} records"""
+        ids = sorted(set(ids))
+        records = {}
+        # Stay under SQLite's default limit of 999 bound parameters
+        for start in range(0, len(ids), 900):
+            batch = ids[start:start + 900]
+            rows = self._conn.execute(
+                f"SELECT id, name, description FROM examples WHERE id IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            for row_id, name, description in rows:
+                records[row_id] = {"餐廳名稱": name, "描述": description}
+        return records
+
+    def close(self):
+        self._conn.close()
+        os.remove(self.path)
+
+@timed()
+def generate_qa_pairs_chunked(
+    source,
+    train_writer: file_source.ChunkWriter,
+    test_writer: file_source.ChunkWriter,
+    chunk_size: int = 10000,
+    test_size: float = 0.2,
+    random_state: int = 42,
+):
+    """
+    Generate train and test QA pairs from the corpus at source while holding
+    at most one chunk of chunk_size rows, plus a CuisineIndex, in memory.
+
+    The corpus is read twice: once to index the training rows, once to pick
+    each row's cuisine examples and append its QA pair to train_writer or
+    test_writer. For a given split the pairs equal generate_qa_pairs; the
+    split itself hashes restaurant names (is_test_restaurant), as a shuffled
+    split needs the whole corpus. Near-duplicate exclusion and semantic
+    examples are not available in this mode.
+
+    Return: Tuple[int, int] of train and test rows written
+    """
+    index = CuisineIndex()
+    try:
+        with stage("index_training_rows") as stats:
+            for chunk, is_test in iter_restaurant_chunks(source, chunk_size, test_size, random_state):
+                index.add(chunk[~is_test])
+            stats.rows = len(index)
+
+        writers = {False: train_writer, True: test_writer}
+        cuisine_iterations = {False: {}, True: {}}
+        for chunk, is_test in iter_restaurant_chunks(source, chunk_size, test_size, random_state):
+            with stage("generate_chunk", rows=len(chunk)):
+                targets = []
+                for restaurant, test in zip(chunk.to_dict("records"), is_test.tolist()):
+                    # Skip generating the row if description is empty
+                    if len(restaurant['描述']) == 0:
+                        continue
+                    cuisine = restaurant['菜式']
+                    iteration = cuisine_iterations[test].get(cuisine, 0)
+                    ids = index.pick(cuisine, restaurant['餐廳名稱'], iteration, random_state)
+                    targets.append((restaurant, test, ids))
+                    cuisine_iterations[test][cuisine] = iteration + 1
+
+                examples = index.lookup(i for _, _, ids in targets for i in ids)
+                qa_pairs = {False: [], True: []}
+                for restaurant, test, ids in targets:
+                    context = format_examples([examples[i] for i in ids])
+                    example_1 = context[0] if len(context) > 0 else ""
+                    example_2 = context[1] if len(context) > 1 else ""
+                    qa_pairs[test].append(build_qa_pair(restaurant, example_1, example_2))
+
+                for test, writer in writers.items():
+                    writer.write(qa_pairs[test])
+    finally:
+        index.close()
+
+    return train_writer.rows, test_writer.rows
+
+def print_example(example):
     print("\n=== Example QA Pair ===")
-    example = train_qa_pairs[0]
     print(f"\nQuestion: {example['question']}")
     print(f"\nExample 1: {example['example_1']}")
     print(f"\nExample 2: {example['example_2']}")
-    print(f"\nAnswer: {example['answer']}")
\ No newline at end of file
+    print(f"\nAnswer: {example['answer']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate train/test QA pairs")
+    parser.add_argument(
+        "--semantic",
+        action="store_true",
+        help="Pick few-shot examples by description embedding instead of cuisine"
+    )
+    parser.add_argument(
+        "--embedding-cache",
+        default="data/embedding_index",
+        help="Directory of the persisted embedding index"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes generating cuisine shards in parallel"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Stream the corpus in chunks of this many rows and write QA pairs as they are "
+             "generated, keeping memory flat (cuisine examples only, hash-based split)"
+    )
+    args = parser.parse_args()
+    if args.chunk_size and (args.semantic or args.workers > 1):
+        parser.error("--chunk-size cannot be combined with --semantic or --workers")
+
+    import pandas as pd
+
+    if args.chunk_size:
+        with file_source.ChunkWriter('resto_new_train.csv', QA_COLUMNS, 'resto_new_train.parquet') as train_writer, \
+                file_source.ChunkWriter('resto_new_test.csv', QA_COLUMNS, 'resto_new_test.parquet') as test_writer:
+            num_train, num_test = generate_qa_pairs_chunked(
+                file_source.restaurants_d_js(),
+                train_writer,
+                test_writer,
+                chunk_size=args.chunk_size
+            )
+        print(f"Number of training data:{num_train}")
+        print(f"Number of test data:{num_test}")
+        if num_train:
+            print_example(pd.read_csv('resto_new_train.csv', nrows=1, encoding='utf-8-sig').fillna('').iloc[0])
+    else:
+        # Load Raw Files 
+        with stage("load_restaurants") as stats:
+            df = file_source.read_restaurants(columns=["餐廳名稱", "菜式", "地區", "描述"])
+            df['菜式'] = df['菜式'].apply(lambda x: x.replace("時尚",""))
+            stats.rows = len(df)
+        with stage("split", rows=len(df)):
+            train_df, test_df = split_data_sklearn(df, group_near_duplicates=True)
+        with stage("build_dedup_index", rows=len(train_df)):
+            dedup_index = build_index(train_df['描述'].fillna('').tolist())
+        embedding_index = EmbeddingIndex(args.embedding_cache) if args.semantic else None
+
+        # Generate QA pairs for training data
+        train_qa_pairs = generate_qa_pairs_sharded(
+            train_df,
+            training_mode="train",
+            dedup_index=dedup_index,
+            embedding_index=embedding_index,
+            num_workers=args.workers
+        )
+        print(f"Number of training data:{len(train_qa_pairs)}")
+        with stage("write_train", rows=len(train_qa_pairs)):
+            train_output_df = pd.DataFrame(train_qa_pairs)
+            train_output_df.to_csv(
+                'resto_new_train.csv',
+                index=True,
+                encoding='utf-8-sig'
+            )
+            file_source.write_parquet(train_output_df, 'resto_new_train.parquet')
+
+        # Generate QA Pairs for test data
+        test_qa_pairs = generate_qa_pairs_sharded(
+            train_df,
+            test_df,
+            training_mode="test",
+            dedup_index=dedup_index,
+            embedding_index=embedding_index,
+            num_workers=args.workers
+        )
+        print(f"Number of training data:{len(test_qa_pairs)}")
+        with stage("write_test", rows=len(test_qa_pairs)):
+            test_qa = pd.DataFrame(test_qa_pairs)
+            test_qa.to_csv(
+                'resto_new_test.csv',
+                index=True,
+                encoding="utf-8-sig"
+            )
+            file_source.write_parquet(test_qa, 'resto_new_test.parquet')
+
+        # Print example
+        print_example(train_qa_pairs[0])
+
+
+if __name__ == "__main__":
+    main()
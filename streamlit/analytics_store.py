@@ -0,0 +1,117 @@
+"""Incrementally maintained arena aggregates shared by all players"""
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, List, Optional
+
+from config import ANALYTICS_DB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS confusion (
+    true_model TEXT NOT NULL,
+    guessed_model TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (true_model, guessed_model)
+);
+CREATE TABLE IF NOT EXISTS cuisine_accuracy (
+    cuisine TEXT NOT NULL,
+    model TEXT NOT NULL,
+    correct INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (cuisine, model)
+);
+CREATE TABLE IF NOT EXISTS question_accuracy (
+    question_idx INTEGER PRIMARY KEY,
+    question TEXT NOT NULL,
+    correct INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS hourly_counts (
+    hour INTEGER PRIMARY KEY,
+    rounds INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+def connect(db_path=ANALYTICS_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=10)
+    # WAL lets the analytics page read while players are submitting
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def record_submission(
+    question_idx: int,
+    question: str,
+    cuisine: Optional[str],
+    correct_models: list,
+    user_selections: list,
+    db_path=ANALYTICS_DB,
+    timestamp: float = None
+):
+    """
+    Fold one submitted round into the aggregates.
+
+    Each update is a constant number of upserts, so the cost of recording a
+    round and of reading the aggregates does not grow with the number of
+    recorded guesses. Positions left on the placeholder are not counted.
+    """
+    guesses = [
+        (model, selection)
+        for model, selection in zip(correct_models, user_selections)
+        if selection in correct_models
+    ]
+    if not guesses:
+        return
+
+    correct = sum(model == selection for model, selection in guesses)
+    hour = int((timestamp or time.time()) // 3600)
+
+    with closing(connect(db_path)) as conn, conn:
+        conn.executemany(
+            """INSERT INTO confusion (true_model, guessed_model, count) VALUES (?, ?, 1)
+               ON CONFLICT (true_model, guessed_model) DO UPDATE SET count = count + 1""",
+            guesses
+        )
+        if cuisine:
+            conn.executemany(
+                """INSERT INTO cuisine_accuracy (cuisine, model, correct, total) VALUES (?, ?, ?, 1)
+                   ON CONFLICT (cuisine, model) DO UPDATE SET
+                       correct = correct + excluded.correct, total = total + 1""",
+                [(cuisine, model, int(model == selection)) for model, selection in guesses]
+            )
+        conn.execute(
+            """INSERT INTO question_accuracy (question_idx, question, correct, total) VALUES (?, ?, ?, ?)
+               ON CONFLICT (question_idx) DO UPDATE SET
+                   correct = correct + excluded.correct, total = total + excluded.total""",
+            (int(question_idx), question, correct, len(guesses))
+        )
+        conn.execute(
+            """INSERT INTO hourly_counts (hour, rounds, correct, total) VALUES (?, 1, ?, ?)
+               ON CONFLICT (hour) DO UPDATE SET
+                   rounds = rounds + 1,
+                   correct = correct + excluded.correct,
+                   total = total + excluded.total""",
+            (hour, correct, len(guesses))
+        )
+
+def load_aggregates(window_hours: int = 24 * 7, db_path=ANALYTICS_DB) -> Dict[str, List[tuple]]:
+    """Read every aggregate table; hourly counts are limited to the last window_hours"""
+    since = int(time.time() // 3600) - window_hours
+    with closing(connect(db_path)) as conn:
+        return {
+            "confusion": conn.execute(
+                "SELECT true_model, guessed_model, count FROM confusion"
+            ).fetchall(),
+            "cuisine_accuracy": conn.execute(
+                "SELECT cuisine, model, correct, total FROM cuisine_accuracy"
+            ).fetchall(),
+            "question_accuracy": conn.execute(
+                "SELECT question_idx, question, correct, total FROM question_accuracy"
+            ).fetchall(),
+            "hourly_counts": conn.execute(
+                "SELECT hour, rounds, correct, total FROM hourly_counts WHERE hour >= ? ORDER BY hour",
+                (since,)
+            ).fetchall(),
+        }
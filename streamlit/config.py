@@ -1,6 +1,7 @@
 # config.py
 """Configuration settings and constants"""
 import streamlit as st
+from pathlib import Path
 
 PAGE_CONFIG = {
     "page_title": "廣東話LLM擂台大決鬥",
@@ -14,4 +15,7 @@ INITIAL_STATE = {
     'submitted': False,
     'scores': {model: 0 for model in MODELS},
     'total_attempts': 0
-}
\ No newline at end of file
+}
+
+# SQLite file holding the cross-player aggregates for the analytics page
+ANALYTICS_DB = Path(__file__).resolve().parent / 'arena_stats.db'
\ No newline at end of file
@@ -1,13 +1,32 @@
 # data_handler.py
 """Data loading and processing functions"""
-import pandas as pd
+from __future__ import annotations
+
 import streamlit as st
-from typing import Tuple, Dict
+import re
+import sys
+from typing import TYPE_CHECKING, Tuple, Dict, Optional
 from pathlib import Path
 
+# The app runs from streamlit/, so make the shared data_cleaning helpers importable
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from data_cleaning import file_source
+
+# pandas is only imported once data is loaded, so the page can paint first
+if TYPE_CHECKING:
+    import pandas as pd
+
 def path(file):
     return Path(__file__).resolve().parent.parent / 'data' / 'q_and_a' / file
 
+def read_table(file, columns):
+    """
+    Read only the needed columns, preferring the Parquet copy written by
+    data_cleaning/convert_to_parquet.py when it is up to date.
+    """
+    # Answers are looked up by row position, so drop any stored index
+    return file_source.read_table(path(file), columns=columns).reset_index(drop=True)
+
 @st.cache_data
 def load_data() -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
     """
@@ -15,18 +34,23 @@ def load_data() -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
     Uses st.cache_data to prevent reloading on every rerun.
     """
     try:
-        questions_df = pd.read_csv(path("testset_questions_chinese.csv"))
+        questions_df = read_table("testset_questions_chinese.csv", ['question'])
         model_answers = {
-            'GPT-4o': pd.read_csv(path("gpt4o.csv")),
-            'Qwen25-3B': pd.read_csv(path("Qwen25-3B.csv")),
-            'Qwen25-0.5B': pd.read_csv(path("Qwen25-05B.csv")),
-            'Qwen25-1.5B': pd.read_csv(path("Qwen25-15B.csv"))
+            'GPT-4o': read_table("gpt4o.csv", ['Answers']),
+            'Qwen25-3B': read_table("Qwen25-3B.csv", ['Answers']),
+            'Qwen25-0.5B': read_table("Qwen25-05B.csv", ['Answers']),
+            'Qwen25-1.5B': read_table("Qwen25-15B.csv", ['Answers'])
         }
         return questions_df, model_answers
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return None, None
 
+def extract_cuisine(question: str) -> Optional[str]:
+    """Cuisine named in a question like '...佢係間潮州菜嚟。'"""
+    match = re.search(r"佢係間(.+?)嚟", question)
+    return match.group(1) if match else None
+
 def get_answers_for_question(
     question_idx: int,
     model_answers: Dict[str, pd.DataFrame]
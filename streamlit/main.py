@@ -3,7 +3,8 @@
 import streamlit as st
 import random
 from config import PAGE_CONFIG
-from data_handler import load_data, get_answers_for_question
+from data_handler import load_data, get_answers_for_question, extract_cuisine
+from analytics_store import record_submission
 from state_manager import initialize_session_state, update_scores, reset_submission_state
 from ui_components import (
     render_header,
@@ -19,15 +20,15 @@ def main():
     # Initialize session state
     initialize_session_state()
     
+    # Render UI components before loading data so the first paint is fast
+    render_header()
+    render_metrics()
+    
     # Load data
     questions_df, model_answers = load_data()
     if questions_df is None or model_answers is None:
         return
     
-    # Render UI components
-    render_header()
-    render_metrics()
-    
     # Add some spacing
     st.markdown("---")
     
@@ -75,6 +76,13 @@ def main():
         if render_control_buttons():
             st.session_state.submitted = True
             update_scores(models, user_selections)
+            record_submission(
+                question_idx,
+                selected_question,
+                extract_cuisine(selected_question),
+                models,
+                user_selections
+            )
             st.rerun()
 
     # Add footer with some spacing
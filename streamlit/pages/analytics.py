@@ -0,0 +1,104 @@
+# analytics.py
+"""Cross-player analytics page, rendered from the incremental aggregates"""
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from analytics_store import load_aggregates
+from config import MODELS, PAGE_CONFIG
+
+WINDOWS = {"24 小時": 24, "7 日": 24 * 7, "30 日": 24 * 30}
+
+def render_confusion(confusion: list):
+    """Share of guesses for each true model, and the most mixed-up pairs"""
+    st.subheader("邊個模型最易被認錯？")
+    if not confusion:
+        st.info("未有任何記錄。")
+        return
+
+    df = pd.DataFrame(confusion, columns=["true_model", "guessed_model", "count"])
+    matrix = (
+        df.pivot(index="true_model", columns="guessed_model", values="count")
+        .reindex(index=MODELS, columns=MODELS)
+        .fillna(0)
+    )
+    shares = matrix.div(matrix.sum(axis=1).replace(0, 1), axis=0) * 100
+    st.caption("行：真正嘅模型，列：玩家估嘅模型 (%)")
+    st.dataframe(shares.round(1), use_container_width=True)
+
+    mistakes = df[df["true_model"] != df["guessed_model"]].nlargest(5, "count")
+    if not mistakes.empty:
+        st.markdown("**最常混淆**")
+        for row in mistakes.itertuples():
+            st.markdown(f"- {row.true_model} 被當成 {row.guessed_model}: {row.count} 次")
+
+def render_cuisine_accuracy(cuisine_accuracy: list):
+    st.subheader("按菜式嘅準確率")
+    if not cuisine_accuracy:
+        st.info("未有任何記錄。")
+        return
+
+    df = pd.DataFrame(cuisine_accuracy, columns=["cuisine", "model", "correct", "total"])
+    totals = df.groupby("cuisine")[["correct", "total"]].sum()
+    table = (df.assign(accuracy=df["correct"] / df["total"] * 100)
+               .pivot(index="cuisine", columns="model", values="accuracy")
+               .reindex(columns=MODELS))
+    table["整體"] = totals["correct"] / totals["total"] * 100
+    table["次數"] = totals["total"]
+    st.dataframe(table.sort_values("整體").round(1), use_container_width=True)
+
+def render_question_accuracy(question_accuracy: list):
+    st.subheader("最難嘅問題")
+    if not question_accuracy:
+        st.info("未有任何記錄。")
+        return
+
+    df = pd.DataFrame(question_accuracy, columns=["question_idx", "question", "correct", "total"])
+    df["accuracy"] = df["correct"] / df["total"] * 100
+    st.dataframe(
+        df.sort_values(["accuracy", "total"], ascending=[True, False])
+          .head(10)[["question", "accuracy", "total"]]
+          .round(1),
+        hide_index=True,
+        use_container_width=True
+    )
+
+def render_activity(hourly_counts: list):
+    st.subheader("活動")
+    if not hourly_counts:
+        st.info("呢段時間未有任何記錄。")
+        return
+
+    df = pd.DataFrame(hourly_counts, columns=["hour", "rounds", "correct", "total"])
+    df.index = [datetime.datetime.fromtimestamp(h * 3600) for h in df["hour"]]
+    cols = st.columns(2)
+    with cols[0]:
+        st.caption("每小時回合數")
+        st.bar_chart(df["rounds"])
+    with cols[1]:
+        st.caption("每小時準確率 (%)")
+        st.line_chart(df["correct"] / df["total"] * 100)
+
+def main():
+    st.set_page_config(**PAGE_CONFIG)
+    st.title("擂台統計")
+
+    window = st.selectbox("活動時間範圍", list(WINDOWS), index=1)
+    aggregates = load_aggregates(window_hours=WINDOWS[window])
+
+    total_guesses = sum(row[2] for row in aggregates["confusion"])
+    correct = sum(row[2] for row in aggregates["confusion"] if row[0] == row[1])
+    st.metric("所有玩家嘅成功率", f"{correct / total_guesses * 100:.1f}%" if total_guesses else "-",
+              help=f"{correct}/{total_guesses} 次估啱")
+
+    render_confusion(aggregates["confusion"])
+    st.markdown("---")
+    render_cuisine_accuracy(aggregates["cuisine_accuracy"])
+    st.markdown("---")
+    render_question_accuracy(aggregates["question_accuracy"])
+    st.markdown("---")
+    render_activity(aggregates["hourly_counts"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Sweep generation parameters and report speed/quality per setting.
+
+Every (backend, model, params, prompt) result is cached on disk, so
+re-running a sweep or widening the grid only generates what is missing.
+Local models run across a process pool, each worker loading the model once;
+OpenAI runs through the async client with bounded concurrency.
+
+Usage:
+    python sweep_generation.py --backend local --model path/to/Qwen2.5-0.5B \
+        --grid '{"max_new_tokens": [128, 256], "repetition_penalty": [1.1, 1.5]}'
+    python sweep_generation.py --backend openai --model gpt-4o \
+        --grid '{"temperature": [0.2, 0.7], "max_tokens": [300, 500]}'
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from metrics import char_ngram_f1, cjk_ratio, distinct_ngram_ratio
+
+ROOT = Path(__file__).resolve().parent
+CACHE_DIR = ROOT / "sweep_cache"
+SAMPLING_PARAMS = {"temperature", "top_p", "top_k"}
+
+
+def expand_grid(grid: dict) -> list:
+    """All combinations of a {name: [values]} grid, in a stable order"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def cache_key(backend: str, model: str, params: dict, prompt: str) -> str:
+    payload = json.dumps([backend, model, params, prompt], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """One JSON file per generation, safe to fill from several processes"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        path = self._path(key)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, key: str, result: dict):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        tmp_path.replace(path)
+
+
+# Per-process model for the local backend, loaded once by the pool initializer
+_local_model = None
+
+
+def _init_local_worker(model_name: str, quantize: bool):
+    global _local_model
+    import torch
+    from finetuning import load_model
+
+    # Workers already run in parallel, so keep each one on a single thread
+    torch.set_num_threads(1)
+    _local_model = load_model(model_name, quantize=quantize)
+
+
+def _generate_local(task):
+    from finetuning import generate
+
+    params, prompt = task
+    model, tokenizer = _local_model
+
+    start = time.perf_counter()
+    output, prompt_length = generate(prompt, model, tokenizer, **params)
+    latency = time.perf_counter() - start
+
+    generated = output[0, prompt_length:]
+    return {
+        "output": tokenizer.decode(generated, skip_special_tokens=True),
+        "latency": latency,
+        "output_tokens": int((generated != tokenizer.pad_token_id).sum()),
+    }
+
+
+def run_local(model_name, tasks, workers, quantize=False):
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_local_worker,
+        initargs=(model_name, quantize)
+    ) as pool:
+        yield from zip(tasks, pool.map(_generate_local, tasks))
+
+
+async def _run_openai(model_name, tasks, concurrency):
+    from openai import AsyncOpenAI
+    from gpt_prompt import chat_request
+
+    client = AsyncOpenAI()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(task):
+        params, prompt = task
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                completion = await client.chat.completions.create(
+                    **chat_request(prompt, model=model_name, **params)
+                )
+            except Exception as e:
+                return {"output": f"Error: {e}", "latency": time.perf_counter() - start,
+                        "output_tokens": 0, "error": True}
+            return {
+                "output": completion.choices[0].message.content,
+                "latency": time.perf_counter() - start,
+                "output_tokens": completion.usage.completion_tokens if completion.usage else 0,
+            }
+
+    return await asyncio.gather(*(call(task) for task in tasks))
+
+
+def run_openai(model_name, tasks, concurrency):
+    return zip(tasks, asyncio.run(_run_openai(model_name, tasks, concurrency)))
+
+
+def local_params(params: dict) -> dict:
+    """transformers ignores sampling parameters unless do_sample is set"""
+    if SAMPLING_PARAMS & params.keys() and "do_sample" not in params:
+        return dict(params, do_sample=True)
+    return params
+
+
+def summarize(params: dict, results: list, references: list) -> dict:
+    """
+    One table row: latency, output length and automatic quality scores.
+
+    Failed calls are only counted in the errors column, so their error
+    messages do not pass for answers in the metrics.
+    """
+    ok = [i for i, r in enumerate(results) if not r.get("error")]
+    row = dict(params)
+    row.update(n=len(ok), errors=len(results) - len(ok))
+    if not ok:
+        return row
+
+    latencies = sorted(results[i]["latency"] for i in ok)
+    outputs = [results[i]["output"] for i in ok]
+    row.update(
+        latency_mean=sum(latencies) / len(latencies),
+        latency_p95=latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        output_tokens_mean=sum(results[i]["output_tokens"] for i in ok) / len(ok),
+        output_chars_mean=sum(len(o) for o in outputs) / len(outputs),
+        distinct_2=sum(distinct_ngram_ratio(o) for o in outputs) / len(outputs),
+        cjk_ratio=sum(cjk_ratio(o) for o in outputs) / len(outputs),
+    )
+    if references:
+        row["f1_vs_answer"] = sum(char_ngram_f1(o, references[i]) for o, i in zip(outputs, ok)) / len(outputs)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep generation parameters")
+    parser.add_argument("--backend", choices=["local", "openai"], required=True)
+    parser.add_argument("--model", required=True, help="Local checkpoint/model id or OpenAI model name")
+    parser.add_argument("--grid", required=True, help='JSON object of parameter lists, e.g. {"temperature": [0.2, 0.7]}')
+    parser.add_argument(
+        "--prompts",
+        default=str(ROOT / "data" / "training" / "resto_new_test.csv"),
+        help="CSV with a 'question' column and optionally a reference 'answer' column"
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N prompts")
+    parser.add_argument("--workers", type=int, default=2, help="Processes (local) or concurrent requests (openai)")
+    parser.add_argument("--quantize", action="store_true", help="Use the int8 model for the local backend")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR))
+    parser.add_argument("--output", default="sweep_results.csv", help="Where to write the results table")
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    prompts_df = pd.read_csv(args.prompts)
+    if args.limit:
+        prompts_df = prompts_df.head(args.limit)
+    if args.backend == "local":
+        from finetuning import build_prompt
+
+        # Same prompt (question plus few-shot examples) as the finetuning data
+        prompts = [build_prompt(row) for _, row in prompts_df.fillna("").iterrows()]
+    else:
+        prompts = prompts_df["question"].tolist()
+    references = prompts_df["answer"].fillna("").tolist() if "answer" in prompts_df else []
+
+    settings = expand_grid(json.loads(args.grid))
+    if args.backend == "local":
+        settings = [local_params(params) for params in settings]
+    cache = ResultCache(args.cache_dir)
+    backend_model = args.model
+    if args.backend == "local":
+        from finetuning import checkpoint_fingerprint
+
+        # Retraining into the same checkpoint directory must not reuse old results
+        backend_model += "@" + checkpoint_fingerprint(args.model) + ("-int8" if args.quantize else "")
+
+    results = {}
+    missing = []
+    for params in settings:
+        for prompt in prompts:
+            key = cache_key(args.backend, backend_model, params, prompt)
+            cached = cache.get(key)
+            if cached is None:
+                missing.append((params, prompt))
+            else:
+                results[key] = cached
+    print(f"{len(settings)} settings x {len(prompts)} prompts: {len(missing)} to generate")
+
+    if missing:
+        if args.backend == "local":
+            generated = run_local(args.model, missing, args.workers, quantize=args.quantize)
+        else:
+            generated = run_openai(args.model, missing, args.workers)
+        for done, ((params, prompt), result) in enumerate(generated, 1):
+            key = cache_key(args.backend, backend_model, params, prompt)
+            # Failed API calls are reported but not cached, so a re-run retries them
+            if not result.get("error"):
+                cache.put(key, result)
+            results[key] = result
+            print(f"Generated {done}/{len(missing)}", end="\r")
+        print()
+
+    rows = []
+    for params in settings:
+        setting_results = [
+            results[cache_key(args.backend, backend_model, params, prompt)] for prompt in prompts
+        ]
+        rows.append(summarize(params, setting_results, references))
+
+    table = pd.DataFrame(rows)
+    table.to_csv(args.output, index=False)
+    print(table.round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Local fake of the OpenAI files and batches endpoints used by gpt_prompt.py.
+
+Batches advance one state per retrieve (validating -> in_progress ->
+completed). Results are written in reverse order, and questions listed in
+`fail` go to the error file. This lets the batch mode run end to end
+without network access:
+
+    python tests/fake_openai.py --port 8765
+    OPENAI_API_KEY=test python gpt_prompt.py --batch --poll-interval 0 \
+        --base-url http://127.0.0.1:8765/v1 --questions data/q_and_a/testset_questions_only.csv
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_STATES = ["validating", "in_progress", "completed"]
+
+
+class FakeOpenAI:
+    """In-memory files and batches; answer(question) builds each reply"""
+
+    def __init__(self, answer=lambda question: f"答案: {question}", fail=(), polls_before_done=2):
+        self.answer = answer
+        self.fail = set(fail)
+        self.polls_before_done = polls_before_done
+        self.files = {}
+        self.batches = {}
+        self.retrieves = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _new_file(self, content: bytes, filename: str, purpose: str) -> dict:
+        file = {
+            "id": f"file-{next(self._ids)}",
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        self.files[file["id"]] = (file, content)
+        return file
+
+    def create_file(self, content: bytes, filename: str, purpose: str) -> dict:
+        with self._lock:
+            return self._new_file(content, filename, purpose)
+
+    def create_batch(self, body: dict) -> dict:
+        with self._lock:
+            batch = {
+                "id": f"batch-{next(self._ids)}",
+                "object": "batch",
+                "endpoint": body["endpoint"],
+                "input_file_id": body["input_file_id"],
+                "completion_window": body["completion_window"],
+                "created_at": int(time.time()),
+                "status": BATCH_STATES[0],
+                "output_file_id": None,
+                "error_file_id": None,
+                "request_counts": None,
+            }
+            self.batches[batch["id"]] = batch
+            self.retrieves[batch["id"]] = 0
+            return batch
+
+    def retrieve_batch(self, batch_id: str) -> dict:
+        with self._lock:
+            batch = self.batches[batch_id]
+            if batch["status"] == "completed":
+                return batch
+            self.retrieves[batch_id] += 1
+            if self.retrieves[batch_id] >= self.polls_before_done:
+                self._complete(batch)
+            else:
+                batch["status"] = BATCH_STATES[1]
+            return batch
+
+    def _complete(self, batch: dict):
+        _, content = self.files[batch["input_file_id"]]
+        requests = [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+
+        outputs, errors = [], []
+        # Results come back in no particular order
+        for request in reversed(requests):
+            position = int(request["custom_id"].split("-", 1)[1])
+            if position in self.fail:
+                errors.append({
+                    "id": f"req-{position}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 400, "body": {"error": {"message": "bad request"}}},
+                    "error": None,
+                })
+                continue
+            question = request["body"]["messages"][-1]["content"]
+            outputs.append({
+                "id": f"req-{position}",
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": self.answer(question)}}]},
+                },
+                "error": None,
+            })
+
+        def to_jsonl(rows):
+            return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+        batch["status"] = "completed"
+        batch["request_counts"] = {"total": len(requests), "completed": len(outputs), "failed": len(errors)}
+        batch["output_file_id"] = self._new_file(to_jsonl(outputs), "output.jsonl", "batch_output")["id"] if outputs else None
+        batch["error_file_id"] = self._new_file(to_jsonl(errors), "errors.jsonl", "batch_output")["id"] if errors else None
+
+    def file_content(self, file_id: str) -> bytes:
+        with self._lock:
+            return self.files[file_id][1]
+
+
+def make_handler(fake: FakeOpenAI):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, payload: dict, status: int = 200):
+            self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_POST(self):
+            if self.path == "/v1/files":
+                # Multipart upload: the purpose field and the file part
+                message = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self._body()
+                )
+                fields = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+                file_part = fields["file"]
+                self._send_json(fake.create_file(
+                    file_part.get_payload(decode=True),
+                    file_part.get_filename(),
+                    fields["purpose"].get_content().strip()
+                ))
+            elif self.path == "/v1/batches":
+                self._send_json(fake.create_batch(json.loads(self._body())))
+            else:
+                self._send_json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                self._send_json(fake.retrieve_batch(parts[2]))
+            elif parts[:2] == ["v1", "files"] and parts[3:] == ["content"]:
+                self._send(200, fake.file_content(parts[2]), "application/octet-stream")
+            else:
+                self._send_json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+    return Handler
+
+
+def serve(fake: FakeOpenAI, port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake on 127.0.0.1 in a background thread; port 0 picks a free one"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI files/batches API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail", type=int, nargs="*", default=[], help="Question positions that fail")
+    args = parser.parse_args()
+
+    server = serve(FakeOpenAI(fail=args.fail), args.port)
+    print(f"Fake OpenAI API on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
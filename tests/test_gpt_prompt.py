@@ -0,0 +1,69 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+from openai import OpenAI
+
+import gpt_prompt
+from fake_openai import FakeOpenAI, serve
+
+QUESTIONS = ["潮樂園係咩餐廳？", "Andō係咩餐廳？", "Racines係咩餐廳？", "Mosu係咩餐廳？"]
+
+
+@pytest.fixture
+def fake():
+    fake = FakeOpenAI(fail={2}, polls_before_done=3)
+    server = serve(fake)
+    yield fake, f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+
+
+def test_answer_batch_maps_results_to_questions(fake, tmp_path):
+    fake, base_url = fake
+    client = OpenAI(base_url=base_url, api_key="test")
+
+    answers = gpt_prompt.answer_batch(client, QUESTIONS, tmp_path / "requests.jsonl", poll_interval=0)
+
+    # Output lines arrive reversed, question 2 only appears in the error file
+    assert answers[0] == f"答案: {QUESTIONS[0]}"
+    assert answers[1] == f"答案: {QUESTIONS[1]}"
+    assert answers[2].startswith("Error:") and "bad request" in answers[2]
+    assert answers[3] == f"答案: {QUESTIONS[3]}"
+    # Polled through validating and in_progress before completing
+    batch_id, = fake.batches
+    assert fake.retrieves[batch_id] == 3
+
+
+def test_incomplete_batch_reports_every_question_as_error(tmp_path):
+    fake = FakeOpenAI()
+    client = OpenAI(base_url="http://unused/v1", api_key="test")
+    batch = fake.create_batch({"endpoint": gpt_prompt.BATCH_ENDPOINT, "input_file_id": "file-0", "completion_window": "24h"})
+    batch["status"] = "expired"
+
+    answers = gpt_prompt.read_batch_answers(client, SimpleNamespace(**batch), len(QUESTIONS))
+
+    assert answers == ["Error: no result (batch expired)"] * len(QUESTIONS)
+
+
+def test_main_batch_mode_writes_answers(fake, tmp_path, monkeypatch):
+    _, base_url = fake
+    questions = tmp_path / "questions.csv"
+    questions.write_text("question\n" + "\n".join(QUESTIONS) + "\n", encoding="utf-8")
+    output = tmp_path / "answers.csv"
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(sys, "argv", [
+        "gpt_prompt.py", "--batch", "--poll-interval", "0", "--base-url", base_url,
+        "--questions", str(questions), "--output", str(output),
+        "--batch-requests", str(tmp_path / "requests.jsonl"),
+    ])
+    gpt_prompt.main()
+
+    import pandas as pd
+
+    result = pd.read_csv(output)
+    assert result["question"].tolist() == QUESTIONS
+    assert result["Answers"][0] == f"答案: {QUESTIONS[0]}"
+    assert result["Answers"][2].startswith("Error:")
@@ -0,0 +1,113 @@
+import sys
+
+import pytest
+
+from pipeline import Pipeline, Stage, default_stages
+
+COPY = "import shutil, sys; shutil.copy(sys.argv[1], sys.argv[2])"
+
+
+def copy_stage(name, source, target):
+    return Stage(name=name, command=[sys.executable, "-c", COPY, source, target], inputs=[source], outputs=[target])
+
+
+def failing_stage(name, source, target):
+    return Stage(name=name, command=[sys.executable, "-c", "raise SystemExit(3)"], inputs=[source], outputs=[target])
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    return tmp_path
+
+
+def make_pipeline(workdir, stages):
+    return Pipeline(stages, cache_path=workdir / "cache.json", root=workdir)
+
+
+def two_branches():
+    return [
+        copy_stage("a1", "a.txt", "a1.txt"),
+        copy_stage("a2", "a1.txt", "a2.txt"),
+        copy_stage("b1", "b.txt", "b1.txt"),
+        copy_stage("b2", "b1.txt", "b2.txt"),
+    ]
+
+
+def test_up_to_date_stages_are_cached(workdir):
+    assert set(make_pipeline(workdir, two_branches()).run(jobs=2).values()) == {"ran"}
+    assert (workdir / "a2.txt").read_text() == "a"
+
+    # A new Pipeline reads the fingerprints back from the cache file
+    assert set(make_pipeline(workdir, two_branches()).run(jobs=2).values()) == {"cached"}
+
+
+def test_changed_input_only_reruns_downstream(workdir):
+    make_pipeline(workdir, two_branches()).run()
+    (workdir / "a.txt").write_text("changed")
+
+    status = make_pipeline(workdir, two_branches()).run(jobs=2)
+
+    assert status == {"a1": "ran", "a2": "ran", "b1": "cached", "b2": "cached"}
+    assert (workdir / "a2.txt").read_text() == "changed"
+
+
+def test_modified_output_reruns_its_stage(workdir):
+    make_pipeline(workdir, two_branches()).run()
+    (workdir / "b2.txt").write_text("edited by hand")
+
+    status = make_pipeline(workdir, two_branches()).run()
+
+    assert status["b2"] == "ran" and status["b1"] == "cached"
+    assert (workdir / "b2.txt").read_text() == "b"
+
+
+def test_failed_stage_blocks_downstream_only(workdir, capsys):
+    stages = [
+        failing_stage("a1", "a.txt", "a1.txt"),
+        copy_stage("a2", "a1.txt", "a2.txt"),
+        copy_stage("a3", "a2.txt", "a3.txt"),
+        copy_stage("b1", "b.txt", "b1.txt"),
+    ]
+
+    status = make_pipeline(workdir, stages).run(jobs=2)
+
+    assert status == {"a1": "failed (3)", "a2": "blocked", "a3": "blocked", "b1": "ran"}
+    assert not (workdir / "a2.txt").exists()
+    out = capsys.readouterr().out
+    assert "[a2] blocked" in out and "[a3] blocked" in out
+
+    # A failed stage is not recorded, so it is retried on the next run
+    assert "a1" not in make_pipeline(workdir, stages).cache
+
+
+def test_dry_run_reports_every_stage(workdir, capsys):
+    # The downstream stage sorts before its upstream one
+    stages = [copy_stage("z-up", "a.txt", "up.txt"), copy_stage("a-down", "up.txt", "down.txt")]
+
+    status = make_pipeline(workdir, stages).run(dry_run=True)
+
+    assert status == {"z-up": "would run", "a-down": "would run"}
+    out = capsys.readouterr().out
+    assert "[z-up] would run" in out and "[a-down] would run" in out
+    assert not (workdir / "up.txt").exists()
+
+
+def test_default_stages_are_connected(tmp_path):
+    pipeline = Pipeline(default_stages(), cache_path=tmp_path / "cache.json")
+
+    # Every answer and arena CSV traces back to the scraped data
+    for name in pipeline.stages:
+        if name.startswith(("answer-", "convert-", "generate-", "questions")):
+            assert "scrape" in pipeline.closure([name]), name
+
+    # The conversions write exactly the answer files the arena app reads
+    arena_csvs = {"data/q_and_a/Qwen25-3B.csv", "data/q_and_a/Qwen25-05B.csv", "data/q_and_a/Qwen25-15B.csv"}
+    converted = {
+        output
+        for name, stage in pipeline.stages.items() if name.startswith("convert-")
+        for output in stage.outputs
+    }
+    assert converted == arena_csvs
+    assert pipeline.stages["answer-gpt4o"].outputs == ["data/q_and_a/gpt4o.csv"]
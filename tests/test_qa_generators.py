@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import qa_generators_v2 as qa
+from data_cleaning.near_duplicates import build_index
+
+CUISINES = ["粵菜", "時尚粵菜", "日本菜", "意大利菜", "泰國菜", "潮州菜", "法國菜"]
+CHARS = "好食環境舒適主廚招牌菜式新鮮食材價格親民人氣甚高建議訂座海鮮燒味點心"
+
+
+def make_corpus(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        # Some chains have several branches and some rows have no description
+        district = rng.choice(["旺角", "中環"])
+        name = f"餐廳{rng.randrange(n // 2)} ({district})"
+        description = "" if rng.random() < 0.05 else "".join(rng.choice(CHARS) for _ in range(rng.randrange(20, 60)))
+        rows.append({"餐廳名稱": name, "菜式": rng.choice(CUISINES), "地區": district, "描述": description})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="module")
+def split():
+    df = make_corpus(300)
+    train_df, test_df = df.iloc[:240].reset_index(drop=True), df.iloc[240:].reset_index(drop=True)
+    return train_df, test_df, build_index(train_df["描述"].tolist())
+
+
+@pytest.mark.parametrize("training_mode", ["train", "test"])
+def test_sharded_output_matches_serial_for_any_worker_count(split, training_mode):
+    train_df, test_df, dedup_index = split
+    serial = qa.generate_qa_pairs(train_df, test_df, training_mode=training_mode, dedup_index=dedup_index)
+
+    for num_workers in (1, 3):
+        sharded = qa.generate_qa_pairs_sharded(
+            train_df, test_df, training_mode=training_mode, dedup_index=dedup_index, num_workers=num_workers
+        )
+        assert sharded == serial, num_workers
+    assert len(serial) > 0 and any(pair["example_2"] for pair in serial)
+
+
+def test_chunked_output_matches_in_memory_for_the_same_split(tmp_path):
+    corpus = make_corpus(300, seed=1)
+    source = tmp_path / "restaurants.csv"
+    corpus.to_csv(source, index=True, encoding="utf-8-sig")
+
+    paths = {name: tmp_path / f"{name}.csv" for name in ("train", "test")}
+    with qa.file_source.ChunkWriter(paths["train"], qa.QA_COLUMNS) as train_writer, \
+            qa.file_source.ChunkWriter(paths["test"], qa.QA_COLUMNS) as test_writer:
+        qa.generate_qa_pairs_chunked(source, train_writer, test_writer, chunk_size=37)
+    chunked = {
+        name: pd.read_csv(path, index_col=0, encoding="utf-8-sig").fillna("").to_dict("records")
+        for name, path in paths.items()
+    }
+
+    df = corpus.copy()
+    df["菜式"] = df["菜式"].str.replace("時尚", "", regex=False)
+    is_test = df["餐廳名稱"].map(qa.is_test_restaurant)
+    train_df, test_df = df[~is_test].reset_index(drop=True), df[is_test].reset_index(drop=True)
+    assert chunked["train"] == qa.generate_qa_pairs(train_df, training_mode="train")
+    assert chunked["test"] == qa.generate_qa_pairs(train_df, test_df, training_mode="test")
+    assert chunked["test"] and any(pair["example_2"] for pair in chunked["test"])
+
+    # Branches of a chain share a side of the split
+    chains = df.assign(chain=df["餐廳名稱"].map(qa.chain_name), is_test=is_test).groupby("chain")["is_test"]
+    assert (chains.nunique() == 1).all()
+    assert (df["餐廳名稱"].map(qa.chain_name).value_counts() > 1).any()